@@ -2,9 +2,11 @@
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from azure.batch import BatchServiceClient
 from azure.batch.batch_auth import SharedKeyCredentials
+from azure.batch import models as batch_models
 
 SRC_ROOT = Path(__file__).resolve().parents[2] / "src"
 if str(SRC_ROOT) not in sys.path:
@@ -17,27 +19,48 @@ from env.config import (
     BATCH_ACCOUNT_URL
     )
 
+from utils.retry import retry
+
 TARGET_POOL_ID = "bronze_pool"  # change to your pool id
+DELETE_WORKERS = 16
 
 def main():
     creds = SharedKeyCredentials(BATCH_ACCOUNT_NAME, BATCH_ACCOUNT_KEY)
     client = BatchServiceClient(creds, batch_url=BATCH_ACCOUNT_URL)
 
-    jobs = client.job.list()  # list all jobs
-    jobs_to_delete = [j for j in jobs if j.pool_info and j.pool_info.pool_id == TARGET_POOL_ID]
+    # Let the service filter by pool and return only the fields we use
+    job_list_options = batch_models.JobListOptions(
+        filter=f"executionInfo/poolId eq '{TARGET_POOL_ID}'",
+        select="id,poolInfo",
+        max_results=1000,
+    )
+    list_jobs = retry()(
+        lambda: [j.id for j in client.job.list(job_list_options=job_list_options)]
+    )
+    delete_job = retry()(client.job.delete)
+
+    jobs_to_delete = list_jobs()
 
     if not jobs_to_delete:
         print(f"No jobs found for pool '{TARGET_POOL_ID}'")
         return
 
-    print(f"Found {len(jobs_to_delete)} jobs in pool '{TARGET_POOL_ID}': {[j.id for j in jobs_to_delete]}")
+    print(f"Found {len(jobs_to_delete)} jobs in pool '{TARGET_POOL_ID}': {jobs_to_delete}")
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(jobs_to_delete))) as ex:
+        futures = {ex.submit(delete_job, job_id): job_id for job_id in jobs_to_delete}
+        for future in as_completed(futures):
+            job_id = futures[future]
+            try:
+                future.result()
+                print(f"Deleted job {job_id}")
+            except Exception as e:
+                print(f"Failed to delete job {job_id}: {e}")
+                failures.append(job_id)
 
-    for j in jobs_to_delete:
-        try:
-            client.job.delete(j.id)
-            print(f"Deleted job {j.id}")
-        except Exception as e:
-            print(f"Failed to delete job {j.id}: {e}")
+    if failures:
+        raise RuntimeError(f"Failed to delete {len(failures)} job(s): {failures}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
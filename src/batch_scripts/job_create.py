@@ -19,6 +19,8 @@ from env.config import (
     BATCH_ACCOUNT_URL,
 )
 
+from utils.retry import retry
+
 POOL_ID = "bronze_pool"
 SCHEDULE_ID = "data_sources_download"
 CONTAINER_IMAGE = "dompedatafusiontest.azurecr.io/bronze_layer:latest"
@@ -61,7 +63,7 @@ def main():
         job_specification=job_spec
     )
 
-    client.job_schedule.add(job_schedule)
+    retry()(client.job_schedule.add)(job_schedule)
     print(f"Created job schedule '{SCHEDULE_ID}' every 2 minutes on pool '{POOL_ID}'")
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple
 
@@ -10,7 +11,6 @@ SRC_ROOT = Path(__file__).resolve().parents[2] / "src"
 if str(SRC_ROOT) not in sys.path:
     sys.path.append(str(SRC_ROOT))
 
-import yaml
 from azure.batch import BatchServiceClient
 from azure.batch.batch_auth import SharedKeyCredentials
 from azure.batch import models as batch_models
@@ -24,16 +24,43 @@ from env.config import (
     SOURCES_CONFIG_PATH,
 )
 
+from utils.retry import retry
+from utils.sources import load_sources_document
+
 JOB_ID = os.environ["AZ_BATCH_JOB_ID"]
 
+# Batch accepts at most 100 tasks per add_collection request.
+TASK_COLLECTION_LIMIT = 100
+SUBMIT_WORKERS = 8
+
+# Groups listed as plain source ids; every other group maps source id -> config.
+SOURCE_GROUP_SHAPES = {
+    "ols": list,
+    "custom": list,
+    "bioportal": list,
+}
+
+# Identical for every task; built once and shared by reference.
+_CONTAINER_SETTINGS = batch_models.TaskContainerSettings(
+    image_name=BRONZE_CONTAINER_IMAGE,
+    container_run_options="--workdir /app",
+    working_directory=batch_models.ContainerWorkingDirectory.container_image_default,
+)
+
+_USER_IDENTITY = batch_models.UserIdentity(
+    auto_user=batch_models.AutoUserSpecification(
+        scope="pool",
+        elevation_level=batch_models.ElevationLevel.non_admin,
+    )
+)
+
 def load_sources_config(
     config_path: Path = SOURCES_CONFIG_PATH,
 ) -> Dict[str, Any]:
     if not config_path.exists():
         raise FileNotFoundError(f"Sources configuration not found at {config_path}")
 
-    with config_path.open("r", encoding="utf-8") as handle:
-        document = yaml.safe_load(handle) or {}
+    document = load_sources_document(config_path)
 
     sources = document.get("sources")
     if not isinstance(sources, dict):
@@ -47,49 +74,62 @@ def build_command_line(group: str, source_id: str) -> str:
         return f"python src/scripts/{group}.py --id {source_id}"
 
 def build_task(group: str, source_id: str) -> batch_models.TaskAddParameter:
-    command_line = build_command_line(group, source_id)
-
-    container_settings = batch_models.TaskContainerSettings(
-        image_name=BRONZE_CONTAINER_IMAGE,
-        container_run_options="--workdir /app",
-        working_directory=batch_models.ContainerWorkingDirectory.container_image_default,
-    )
-
     return batch_models.TaskAddParameter(
         id=f"{group}_{source_id}",
-        command_line=command_line,
-        container_settings=container_settings,
-        user_identity=batch_models.UserIdentity(
-            auto_user=batch_models.AutoUserSpecification(
-                scope="pool",
-                elevation_level=batch_models.ElevationLevel.non_admin,
-            )
-        ),
+        command_line=build_command_line(group, source_id),
+        container_settings=_CONTAINER_SETTINGS,
+        user_identity=_USER_IDENTITY,
     )
 
 def enumerate_sources(sources: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
     for group, payload in sources.items():
+        expected = SOURCE_GROUP_SHAPES.get(group, dict)
+        if not isinstance(payload, expected):
+            raise ValueError(f"{group} must be a {'list' if expected is list else 'mapping'}")
+
+        for source_id in payload:
+            yield group, source_id
+
+def chunk_tasks(
+    task_list: List[batch_models.TaskAddParameter],
+    size: int = TASK_COLLECTION_LIMIT,
+) -> List[List[batch_models.TaskAddParameter]]:
+    return [task_list[i:i + size] for i in range(0, len(task_list), size)]
+
+def check_pool_capacity(client: BatchServiceClient, task_count: int) -> None:
+    """
+    Compare the task fan-out with the task slots the job's pool currently has.
+    Informational only: tasks beyond the free slots stay queued on the job.
+    """
+    try:
+        pool_id = retry()(client.job.get)(JOB_ID).pool_info.pool_id
+        if not pool_id:
+            logging.info("Job %s has no fixed pool; skipping pool capacity check.", JOB_ID)
+            return
+        pool = retry()(client.pool.get)(pool_id)
+    except Exception as exc:
+        # A failed probe must never block task submission.
+        logging.warning("Could not read pool capacity for job %s: %s", JOB_ID, exc)
+        return
 
-        if group == "ols":
-            if not isinstance(payload, list):
-                raise ValueError("ols must be a list")
-            for source_id in payload:
-                yield group, source_id
-        elif group == "custom":
-            if not isinstance(payload, list):
-                raise ValueError("custom must be a list")
-            for source_id in payload:
-                yield group, source_id
-        elif group == "bioportal":
-            if not isinstance(payload, list):
-                raise ValueError("custom must be a list")
-            for source_id in payload:
-                yield group, source_id
-        else:
-            if not isinstance(payload, dict):
-                raise ValueError(f"{group} must be a mapping")
-            for source_id in payload.keys():
-                yield group, source_id
+    nodes = (pool.current_dedicated_nodes or 0) + (pool.current_low_priority_nodes or 0)
+    slots = nodes * (pool.task_slots_per_node or 1)
+
+    logging.info(
+        "Pool %s (%s): %d node(s), %d task slot(s) for %d task(s).",
+        pool_id,
+        pool.vm_size,
+        nodes,
+        slots,
+        task_count,
+    )
+    if task_count > slots:
+        logging.warning(
+            "%d task(s) exceed the %d available slot(s) of pool %s; the rest will queue.",
+            task_count - slots,
+            slots,
+            pool_id,
+        )
 
 def submit_tasks(
     client: BatchServiceClient,
@@ -100,16 +140,45 @@ def submit_tasks(
         logging.info("No tasks to submit.")
         return
 
-    try:
-        client.task.add_collection(JOB_ID, task_list)
-        logging.info("Submitted %d tasks to job %s.", len(task_list), JOB_ID)
+    check_pool_capacity(client, len(task_list))
 
-    except CreateTasksErrorException as exc:
+    chunks = chunk_tasks(task_list)
+    add_collection = retry()(client.task.add_collection)
+    failure_tasks = []
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=min(SUBMIT_WORKERS, len(chunks))) as pool:
+        futures = [
+            pool.submit(add_collection, JOB_ID, chunk)
+            for chunk in chunks
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except CreateTasksErrorException as exc:
+                failure_tasks.extend(exc.failure_tasks)
+                errors.extend(exc.errors)
+            except Exception as exc:
+                errors.append(exc)
+
+    if failure_tasks or errors:
         logging.error("Failed to add tasks.")
-        if exc.failure_tasks:
-            for ft in exc.failure_tasks:
-                logging.error("Task %s failed: %s", ft.task_id, ft.error)
-        raise
+        for ft in failure_tasks:
+            logging.error("Task %s failed: %s", ft.task_id, ft.error)
+        for err in errors:
+            logging.error("Submission error: %s", err)
+        raise CreateTasksErrorException(
+            pending_tasks=[],
+            failure_tasks=failure_tasks,
+            errors=errors,
+        )
+
+    logging.info(
+        "Submitted %d tasks to job %s in %d request(s).",
+        len(task_list),
+        JOB_ID,
+        len(chunks),
+    )
 
 def create_batch_client() -> BatchServiceClient:
     if not all(
@@ -133,10 +202,13 @@ def main() -> None:
     sources = load_sources_config()
     client = create_batch_client()
 
-    tasks = (
-        build_task(group, source_id)
-        for group, source_id in enumerate_sources(sources)
-    )
+    with ThreadPoolExecutor(max_workers=SUBMIT_WORKERS) as pool:
+        tasks = list(
+            pool.map(
+                lambda group_source: build_task(*group_source),
+                enumerate_sources(sources),
+            )
+        )
 
     submit_tasks(client, tasks)
 
@@ -2,8 +2,7 @@ import sys
 import logging
 import hashlib
 import argparse
-import requests
-import yaml
+import tempfile
 
 from datetime import datetime, timezone
 from pathlib import Path
@@ -23,6 +22,9 @@ if str(SRC_DIR) not in sys.path:
 
 from env.config import BLOB_CONNECTION_STRING, BRONZE_CONTAINER
 
+from utils.sources import load_sources_document
+from utils.sessions import create_session
+
 from utils.versioning import (
     update_latest_folder,
     update_manifest,
@@ -43,6 +45,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("API")
 
 CHUNK_SIZE = 8 * 1024 * 1024
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+UPLOAD_CONCURRENCY = 8
+
+SESSION = create_session()
+
+_EMPTY_HEADERS: Dict[str, str] = {}
 
 VERSION_FUNC_REGISTRY: Dict[str, Callable[[logging.Logger], str]] = {
     "quickgo": QUICKGO_version,
@@ -52,8 +60,7 @@ VERSION_FUNC_REGISTRY: Dict[str, Callable[[logging.Logger], str]] = {
 def load_sources_config(config_path: Path) -> Dict[str, Dict[str, Any]]:
     if not config_path.exists():
         raise FileNotFoundError(f"Sources configuration not found at {config_path}")
-    with config_path.open("r", encoding="utf-8") as handle:
-        document = yaml.safe_load(handle) or {}
+    document = load_sources_document(config_path)
     ftp_sources = document["sources"]["api"]
     if not isinstance(ftp_sources, dict):
         raise ValueError("The 'sources' section in sources.yaml must be a mapping.")
@@ -63,19 +70,16 @@ def is_probe_operation(op: Dict) -> bool:
     return "probe" in op
 
 def build_request(
-    base_url: str,
+    base: str,
     operation: Dict
 ) -> Dict:
-    if "probe" in operation:
-        path = operation["probe"]
-    else:
-        path = operation["name"]
+    path = operation.get("probe") or operation["name"]
 
     return {
-        "url": f"{base_url.rstrip('/')}/{path}",
+        "url": f"{base}/{path}",
         "method": "GET",
         "params": operation.get("params"),
-        "headers": operation.get("headers", {})
+        "headers": operation.get("headers", _EMPTY_HEADERS)
     }
 
 def run_probe(
@@ -96,27 +100,32 @@ def download_and_upload(
 ) -> str:
 
     blob_client = container.get_blob_client(blob_name)
-    sha256 = hashlib.sha256()
 
-    with requests.get(
-        request_cfg["url"],
-        params=request_cfg.get("params"),
-        headers=request_cfg.get("headers"),
-        stream=True,
-        timeout=300
-    ) as resp:
+    # Spool the payload (RAM up to SPOOL_MAX_SIZE, disk beyond) so the digest is
+    # computed in C by hashlib.file_digest instead of per-chunk in the upload loop.
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        with SESSION.get(
+            request_cfg["url"],
+            params=request_cfg.get("params"),
+            headers=request_cfg.get("headers"),
+            stream=True,
+            timeout=300
+        ) as resp:
 
-        resp.raise_for_status()
+            resp.raise_for_status()
 
-        def stream():
             for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
                 if chunk:
-                    sha256.update(chunk)
-                    yield chunk
+                    spool.write(chunk)
+
+        length = spool.tell()
+        spool.seek(0)
+        sha256 = hashlib.file_digest(spool, "sha256").hexdigest()
 
-        blob_client.upload_blob(stream(), overwrite=True)
+        spool.seek(0)
+        blob_client.upload_blob(spool, length=length, overwrite=True, max_concurrency=UPLOAD_CONCURRENCY)
 
-    return sha256.hexdigest()
+    return sha256
 
 def run_ingestion(source_id: str):
 
@@ -139,6 +148,8 @@ def run_ingestion(source_id: str):
         logger.info("%s already up to date.", args.id)
         sys.exit(0)
 
+    base = source_cfg["base_url"].rstrip("/")
+
     hosts = []
     list_of_files = []
     for op in source_cfg.get("operations", []):
@@ -146,7 +157,7 @@ def run_ingestion(source_id: str):
         if is_probe_operation(op):
             continue
 
-        req = build_request(source_cfg["base_url"], op)
+        req = build_request(base, op)
         hosts.append(req["url"])
         
         blob_name = f"{base_path}/{op['filename']}"
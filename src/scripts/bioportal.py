@@ -1,7 +1,7 @@
 import logging
-import requests
 import argparse
 import sys
+import tempfile
 
 from pathlib import Path
 from typing import Tuple
@@ -37,6 +37,8 @@ from env.config import (
 
 from extractor import extract
 
+from utils.sessions import create_session
+
 from utils.versioning import (
     extract_version,
     is_newer_version,
@@ -64,6 +66,16 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+# Ask for the artifact as stored; gzip transfer-coding would otherwise have to be
+# inflated on the fly before the upload.
+DOWNLOAD_HEADERS = {**HEADERS, "Accept-Encoding": "identity"}
+
+CHUNK_SIZE = 8 * 1024 * 1024
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+UPLOAD_CONCURRENCY = 8
+
+SESSION = create_session()
+
 # ==============================================================================
 # Metadata resolution
 # ==============================================================================
@@ -78,18 +90,12 @@ def fetch_bioportal_metadata(ontology_id: str) -> Tuple[str, str, str]:
         latest_submission_url (str)
     """
 
-    ontology_url = f"{ONTOLOGY_ENDPOINT}/{ontology_id}"
-    logger.info("Querying BioPortal ontology endpoint: %s", ontology_url)
-
-    r = requests.get(ontology_url, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    payload = r.json()
-
-    latest_submission_url = payload["links"]["latest_submission"]
-
+    # /latest_submission embeds the ontology links, so one round-trip resolves
+    # both the version marker and the download URL.
+    latest_submission_url = f"{ONTOLOGY_ENDPOINT}/{ontology_id}/latest_submission"
     logger.info("Querying latest submission: %s", latest_submission_url)
 
-    r = requests.get(latest_submission_url, headers=HEADERS, timeout=30)
+    r = SESSION.get(latest_submission_url, headers=HEADERS, timeout=30)
     r.raise_for_status()
     submission = r.json()
 
@@ -149,12 +155,12 @@ def download_and_upload(
 
     logger.info("Downloading artifact from: %s", url)
 
-    with requests.get(
+    with SESSION.get(
         url,
-        headers=HEADERS,
+        headers=DOWNLOAD_HEADERS,
         stream=True,
         timeout=120
-    ) as r:
+    ) as r, tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
         r.raise_for_status()
 
         # Filename resolution priority:
@@ -173,9 +179,20 @@ def download_and_upload(
         blob_path = f"raw/{ontology_id}/latest/{version}/{filename}"
         blob_client = container.get_blob_client(blob_path)
 
+        # Spooling gives the SDK a seekable source with a known length, so it can
+        # stage blocks in parallel instead of streaming one block at a time.
+        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                spool.write(chunk)
+
+        length = spool.tell()
+        spool.seek(0)
+
         blob_client.upload_blob(
-            r.raw,
-            overwrite=True
+            spool,
+            length=length,
+            overwrite=True,
+            max_concurrency=UPLOAD_CONCURRENCY
         )
 
         logger.info("Uploaded blob to: %s", blob_path)
@@ -1,13 +1,16 @@
-import argparse
 import io
 import gzip
+import tarfile
 import zipfile
 import logging
-import json
 import sys
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
+from azure.storage.blob import ContainerClient
 
 
 # Add project root for imports
@@ -15,12 +18,94 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from env.config import BLOB_CONNECTION_STRING, BRONZE_CONTAINER
-from utils.data import load_manifest, create_blob_client
+from utils.data import load_manifest, create_blob_client, update_manifest_atomically
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ExtractorWorker")
 
+COPY_POLL_INTERVAL = 2  # seconds
+EXTRACT_WORKERS = 16
+ZIP_READ_BUFFER = 4 * 1024 * 1024
+GZIP_READ_SIZE = 8 * 1024 * 1024
+GZIP_QUEUE_DEPTH = 4
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+_END_OF_STREAM = object()
+
+class IterStream(io.RawIOBase):
+    """
+    Raw stream over an iterator of byte chunks (e.g. StorageStreamDownloader.chunks()).
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+
+        read = min(len(buffer), len(self._pending))
+        buffer[:read] = self._pending[:read]
+        self._pending = self._pending[read:]
+        return read
+
+class BlobRangeReader(io.RawIOBase):
+    """
+    Seekable, read-only view of a blob. Each read is served by a ranged
+    download, so only the bytes a consumer asks for leave the storage account.
+    """
+
+    def __init__(self, blob_client, size=None):
+        self._blob_client = blob_client
+        self._size = size if size is not None else blob_client.get_blob_properties().size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+
+        self._pos = pos
+        return self._pos
+
+    def readinto(self, buffer):
+        if self._pos >= self._size:
+            return 0
+
+        length = min(len(buffer), self._size - self._pos)
+        data = self._blob_client.download_blob(offset=self._pos, length=length).readall()
+
+        read = len(data)
+        buffer[:read] = data
+        self._pos += read
+        return read
+
 def archive_root_from_blob_path(blob_path: str) -> str:
     """
     Converts:
@@ -41,17 +126,53 @@ def stream_gzip_decompression(container, raw_path, dest_path):
 
     logger.info(f"Streaming decompression (GZIP): {raw_path} -> {dest_path}")
 
-    def decompressed_chunks(chunk_size=1024 * 1024):
-        with gzip.GzipFile(fileobj=downloader) as gz:
-            while True:
-                chunk = gz.read(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
+    # Download + inflate run on a producer thread; the upload drains the queue,
+    # so decompression CPU overlaps with network transfer on both sides.
+    compressed = io.BufferedReader(IterStream(downloader.chunks()), buffer_size=GZIP_READ_SIZE)
+    chunks = queue.Queue(maxsize=GZIP_QUEUE_DEPTH)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decompress():
+        try:
+            with gzip.GzipFile(fileobj=compressed) as gz:
+                while True:
+                    chunk = gz.read(GZIP_READ_SIZE)
+                    if not chunk:
+                        break
+                    if not put(chunk):
+                        return
+        except Exception as exc:
+            put(exc)
+            return
+        put(_END_OF_STREAM)
+
+    def decompressed_chunks():
+        while True:
+            item = chunks.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
 
-    container.upload_blob(dest_path, decompressed_chunks(), overwrite=True)
+    producer = threading.Thread(target=decompress, daemon=True)
+    producer.start()
+    try:
+        container.upload_blob(dest_path, decompressed_chunks(), overwrite=True)
+    finally:
+        stop.set()
+        producer.join()
 
-def stream_zip_extraction(container, raw_path):
+def stream_zip_extraction(container, raw_path, blob_size=None):
     """
     Extracts ZIP members while preserving:
     - original blob directory
@@ -67,10 +188,11 @@ def stream_zip_extraction(container, raw_path):
     logger.info(f"Extracting ZIP with structure preservation: {raw_path}")
     logger.info(f"Archive root: {archive_root}")
 
-    # ZIP requires random access → read once
-    raw_data = blob_client.download_blob().readall()
+    # ZIP requires random access → ranged reads: the central directory first,
+    # then each member at its header offset, instead of buffering the archive
+    reader = io.BufferedReader(BlobRangeReader(blob_client, blob_size), buffer_size=ZIP_READ_BUFFER)
 
-    with zipfile.ZipFile(io.BytesIO(raw_data)) as z:
+    with zipfile.ZipFile(reader) as z:
         for member in z.infolist():
             if member.is_dir():
                 continue
@@ -91,9 +213,120 @@ def stream_zip_extraction(container, raw_path):
     return extracted_paths
 
 
+def server_side_copy(container, src_path, dest_path):
+    """
+    Copy a blob within the container on the storage service, without routing
+    the bytes through this node.
+    """
+    src_client = container.get_blob_client(src_path)
+    dest_client = container.get_blob_client(dest_path)
+
+    logger.info(f"Server-side copy: {src_path} -> {dest_path}")
+    copy = dest_client.start_copy_from_url(src_client.url)
+
+    status = copy["copy_status"]
+    while status == "pending":
+        time.sleep(COPY_POLL_INTERVAL)
+        status = dest_client.get_blob_properties().copy.status
+
+    if status != "success":
+        raise RuntimeError(f"Copy {src_path} -> {dest_path} finished with status '{status}'")
+
+def stream_targz_extraction(container, raw_path):
+    """
+    Extracts a .tar.gz archive member by member in a single forward pass
+    (tar stream mode), preserving the internal folder structure.
+    """
+    blob_client = container.get_blob_client(raw_path)
+    downloader = blob_client.download_blob()
+    extracted_paths = []
+
+    archive_root = archive_root_from_blob_path(raw_path[:-len(".gz")])
+
+    logger.info(f"Extracting TAR.GZ with structure preservation: {raw_path}")
+    logger.info(f"Archive root: {archive_root}")
+
+    compressed = io.BufferedReader(IterStream(downloader.chunks()), buffer_size=GZIP_READ_SIZE)
+
+    with tarfile.open(fileobj=compressed, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+
+            dest_path = f"{archive_root}/{member.name}"
+
+            logger.info(f"Extracting TAR member: {member.name} → {dest_path}")
+
+            container.upload_blob(
+                dest_path,
+                tar.extractfile(member),
+                length=member.size,
+                overwrite=True
+            )
+
+            extracted_paths.append(dest_path)
+
+    return extracted_paths
+
+def _strip_suffix(path, suffix_length):
+    return path.replace("raw/", "extracted/", 1)[:-suffix_length]
+
+def _gz(container, file_path):
+    dest = _strip_suffix(file_path, len(".gz"))
+    stream_gzip_decompression(container, file_path, dest)
+    return [dest]
+
+def _zip(container, file_path):
+    # One 4-byte ranged read tells ZIP from a misnamed GZIP; its response also
+    # carries the blob size, which spares the range reader a properties call.
+    blob_client = container.get_blob_client(file_path)
+    probe = blob_client.download_blob(offset=0, length=4)
+    header = probe.readall()
+
+    if header[:2] == GZIP_MAGIC:
+        logger.warning(f"File {file_path} is GZIP despite .zip extension")
+        dest = _strip_suffix(file_path, len(".zip"))
+        stream_gzip_decompression(container, file_path, dest)
+        return [dest]
+
+    if header == ZIP_MAGIC:
+        # Content-Range is "bytes 0-3/<blob size>"
+        blob_size = int(probe.properties.content_range.rsplit("/", 1)[1])
+        return stream_zip_extraction(container, file_path, blob_size)
+
+    logger.warning(f"File {file_path} is neither ZIP nor GZIP; copying as-is")
+    return _direct_copy(container, file_path)
+
+def _targz(container, file_path):
+    return stream_targz_extraction(container, file_path)
+
+def _direct_copy(container, file_path):
+    # No decompression needed
+    dest = file_path.replace("raw/", "extracted/", 1)
+    server_side_copy(container, file_path, dest)
+    return [dest]
+
+# Lower-cased last extension -> handler; anything else is copied as-is.
+HANDLERS = {
+    "gz": _gz,
+    "zip": _zip,
+}
+
+def process_file(container, file_path):
+    """
+    Extract a single raw blob and return the destination paths it produced.
+    """
+    logger.info(f"Processing source file: {file_path}")
+
+    lowered = file_path.lower()
+    if lowered.endswith(".tar.gz"):
+        handler = _targz
+    else:
+        handler = HANDLERS.get(lowered.rsplit(".", 1)[-1], _direct_copy)
+
+    return handler(container, file_path)
+
 def extract(source_id: str, container: ContainerClient, logger: logging.Logger):
-    service = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
-    container = service.get_container_client(BRONZE_CONTAINER)
     manifest_client = create_blob_client(container, "manifest.json")
     
     # Load manifest for atomic update
@@ -104,44 +337,25 @@ def extract(source_id: str, container: ContainerClient, logger: logging.Logger):
         logger.error(f"No files found for {source_id}")
         return
 
-    all_extracted = []
+    files = entry["list_of_files"]
     try:
-        for file_path in entry["list_of_files"]:
-            logger.info(f"Processing source file: {file_path}")
-            
-            # 1. GZIP Streaming
-            if file_path.lower().endswith(".gz") and not file_path.lower().endswith(".tar.gz"):
-                dest = file_path.replace("raw/", "extracted/", 1).replace(".gz", "").replace(".GZ", "")
-                stream_gzip_decompression(container, file_path, dest)
-                all_extracted.append(dest)
-                
-            # 2. ZIP Member-by-Member
-            elif file_path.lower().endswith(".zip"):
-                # Check if it's actually a gzip file misnamed as .zip
-                blob_client = container.get_blob_client(file_path)
-                header = blob_client.download_blob(offset=0, length=2).readall()
-                
-                if header == b'\x1f\x8b':  # GZIP magic bytes
-                    logger.warning(f"File {file_path} is GZIP despite .zip extension")
-                    dest = file_path.replace("raw/", "extracted/", 1).replace(".zip", "")
-                    stream_gzip_decompression(container, file_path, dest)
-                    all_extracted.append(dest)
-                else:
-                    paths = stream_zip_extraction(container, file_path)
-                    all_extracted.extend(paths)
-            # 3. Fallback: Direct Copy (No decompression needed)
-            else:
-                dest = file_path.replace("raw/", "extracted/", 1)
-                blob_client = container.get_blob_client(file_path)
-                logger.info(f"Direct stream copy: {file_path} -> {dest}")
-                # Pass the downloader directly to upload_blob for a pipe-like transfer
-                container.upload_blob(dest, blob_client.download_blob(), overwrite=True)
-                all_extracted.append(dest)
-        
-        # 4. Atomic Manifest Update: Only runs if the entire loop succeeds
-        entry["extracted"] = True
-        entry["extracted_list_of_files"] = all_extracted
-        manifest_client.upload_blob(json.dumps(manifest, indent=2), overwrite=True)
+        # Files are independent and mostly waiting on blob I/O, so overlap them.
+        # map() keeps the manifest order and re-raises the first failure.
+        with ThreadPoolExecutor(max_workers=min(EXTRACT_WORKERS, len(files))) as ex:
+            results = list(ex.map(lambda file_path: process_file(container, file_path), files))
+
+        all_extracted = [path for paths in results for path in paths]
+
+        # 4. Atomic Manifest Update: Only runs once every file succeeded.
+        # Re-applied on a fresh read if another writer changed the manifest meanwhile.
+        def mark_extracted(current: dict) -> None:
+            current_entry = current.get(source_id)
+            if current_entry is None:
+                raise RuntimeError(f"Manifest entry for {source_id} disappeared during extraction")
+            current_entry["extracted"] = True
+            current_entry["extracted_list_of_files"] = all_extracted
+
+        update_manifest_atomically(manifest_client, mark_extracted, logger)
         logger.info(f"Extraction completed successfully for {source_id}")
         
     except Exception as e:
@@ -1,16 +1,21 @@
 import argparse
-import yaml
 import logging
 import sys
 import time
 import random
+import re
 import socket
+import queue
+import threading
 
-from ftplib import FTP, error_temp
+from concurrent.futures import ThreadPoolExecutor
+
+from ftplib import FTP, Error as FTPError, error_perm, error_temp
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List
 from datetime import datetime, timezone
-from azure.storage.blob import ContainerClient, BlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobClient, ContainerClient
 
 BASE_DIR = Path(__file__).resolve().parents[1]   # /app/src
 CONFIG_PATH = BASE_DIR.parent / "config" / "sources.yaml"
@@ -31,16 +36,42 @@ from env.config import (
 )
 
 from utils.versioning import (
+    ManifestBatch,
     update_manifest,
     update_latest_folder,
     extract_version,
     is_newer_version
 )
 
+from utils.data import create_blob_service_client
+from utils.sources import load_sources_document
+
 from extractor import (
     extract
 )
 
+# Parallel FTP connections per host; override per host with `connections_per_host`.
+DEFAULT_CONNECTIONS_PER_HOST = 4
+
+# Transfer sessions open at once across all hosts of a run.
+MAX_CONCURRENT_TRANSFERS = 16
+TRANSFER_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_TRANSFERS)
+
+# Staged block size for uploads and read buffer on the FTP data socket.
+TRANSFER_BLOCK_SIZE = 16 * 1024 * 1024
+# Files up to this size go up in a single Put Blob.
+MAX_SINGLE_PUT_SIZE = 64 * 1024 * 1024
+
+# MDTM commands sent back-to-back before reading their replies.
+MDTM_BATCH_SIZE = 32
+
+# Seconds between NOOPs on the control connection during a long RETR.
+NOOP_INTERVAL = 30
+
+# Blob metadata keys holding the source file's FTP modification time and size.
+FTP_MDTM_METADATA_KEY = "ftp_mdtm"
+FTP_SIZE_METADATA_KEY = "ftp_size"
+
 def connect_ftp(
     host: str,
     timeout: int = 3600,  # 1 hour instead of 5 minutes
@@ -54,6 +85,9 @@ def connect_ftp(
             ftp = FTP()
             ftp.connect(host, timeout=timeout)
             ftp.login()  # anonymous
+            # Passive binary mode for every transfer on this connection
+            ftp.set_pasv(True)
+            ftp.voidcmd("TYPE I")
             if ftp.sock is not None:
                 ftp.sock.settimeout(timeout)            
             return ftp
@@ -74,219 +108,439 @@ def connect_ftp(
 
     raise RuntimeError(f"FTP connection to {host} failed after {retries} retries") from last_exc
 
-def ftp_stream_to_blob(
-    host: str,
-    path: str,
-    filename: str,
-    container_client: ContainerClient,
-    blob_path: str,
-) -> None:
-    logger.info("Streaming FTP file %s from %s%s", filename, host, path)
-
-    ftp = connect_ftp(host, timeout=3600*24)
-    blob_client = container_client.get_blob_client(blob_path)
-    data_sock = None
-    
-    try:
-        # Delete existing blob
+class FTPSession:
+    """
+    One logged-in FTP control connection, positioned in `path` and reused for
+    every LIST / MDTM / RETR issued against that folder.
+
+        with FTPSession(host, path) as session:
+            for name in session.list():
+                ...
+    """
+
+    def __init__(self, host: str, path: str, timeout: int = 3600):
+        self.host = host
+        self.path = path
+        self.timeout = timeout
+        self.ftp: FTP | None = None
+        self._noops_sent = 0
+
+    def __enter__(self) -> "FTPSession":
+        self.ftp = connect_ftp(self.host, timeout=self.timeout)
         try:
-            blob_client.delete_blob()
+            self.ftp.cwd(self.path)
         except Exception:
-            pass
-
-        # Configure FTP
-        ftp.set_pasv(True)
-        ftp.cwd(path)
-        
-        # Open data connection
-        ftp.sendcmd("TYPE I")
-        data_sock = ftp.transfercmd(f"RETR {filename}")
-        data_sock.settimeout(3600)
-        
-        logger.info("Starting upload to Azure (this may take 30+ minutes for large files)...")
-        
-        # Stream to Azure
-        with data_sock.makefile("rb") as fp:
-            blob_client.upload_blob(
-                data=fp,
-                overwrite=True,
-                blob_type="BlockBlob",
-                max_concurrency=4                         
-            )
-        
-        # Close data socket - upload succeeded if we reach here
-        data_sock.close()
-        data_sock = None
-        
-        logger.info("✓ Uploaded FTP file to blob %s", blob_path)
-                
-    except Exception as e:
-        logger.error("Failed to stream %s: %s", filename, e)
-        raise
-        
-    finally:
-        # Cleanup
-        if data_sock:
-            try:
-                data_sock.close()
-            except Exception:
-                pass
-        
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.ftp is None:
+            return
         try:
-            ftp.quit()
+            self.ftp.quit()
         except Exception:
             try:
-                ftp.close()
+                self.ftp.close()
             except Exception:
                 pass
-            
+        self.ftp = None
+
+    def list(self) -> list[str]:
+        return self.ftp.nlst()
+
+    def list_with_mtime(self) -> dict[str, str | None]:
+        """
+        Map each file in the folder to its YYYYMMDDHHMMSS modification time using
+        a single MLSD listing. Servers without MLSD fall back to NLST, with the
+        times left as None for the caller to resolve through mdtm_batch().
+        """
+        try:
+            return {
+                name: facts["modify"][:14] if "modify" in facts else None
+                for name, facts in self.ftp.mlsd(facts=["type", "modify"])
+                if facts.get("type") == "file"
+            }
+        except error_perm as e:
+            logger.info("MLSD not supported on %s (%s); falling back to NLST + MDTM", self.host, e)
+            return dict.fromkeys(self.list())
+
+    def mdtm_batch(self, filenames: List[str], batch_size: int = MDTM_BATCH_SIZE) -> dict[str, str | None]:
+        """
+        MDTM for many files with pipelined commands: each batch is written to the
+        control socket at once and the replies read back in order, so a batch
+        costs one round trip instead of one per file.
+        """
+        last_modified: dict[str, str | None] = {}
+
+        for start in range(0, len(filenames), batch_size):
+            batch = filenames[start:start + batch_size]
+            commands = "".join(f"MDTM {name}\r\n" for name in batch)
+            self.ftp.sock.sendall(commands.encode(self.ftp.encoding))
+
+            for name in batch:
+                try:
+                    timestamp = self.ftp.getresp().split()[1][:14]
+                    last_modified[name] = timestamp if timestamp.isdigit() else None
+                except (FTPError, IndexError) as e:
+                    logger.warning("MDTM %s failed on %s%s: %s", name, self.host, self.path, e)
+                    last_modified[name] = None
+
+        return last_modified
+
+    def size(self, filename: str) -> int | None:
+        try:
+            return self.ftp.size(filename)
+        except (FTPError, ValueError) as e:
+            logger.warning("SIZE %s failed on %s%s: %s", filename, self.host, self.path, e)
+            return None
+
+    def retr_to_blob(
+        self,
+        filename: str,
+        blob_client: BlobClient,
+        metadata: Dict[str, str] | None = None,
+    ) -> None:
+        logger.info("Streaming FTP file %s from %s%s", filename, self.host, self.path)
+
+        data_sock = None
+        stop_heartbeat = threading.Event()
+        self._noops_sent = 0
+
+        try:
+            # Known length lets the SDK pick one Put Blob (<= MAX_SINGLE_PUT_SIZE)
+            # or staged blocks up front instead of buffering to find out
+            size = self.size(filename)
+            if size is not None:
+                metadata = {**(metadata or {}), FTP_SIZE_METADATA_KEY: str(size)}
+
+            # Open data connection (passive, binary: set at connect)
+            data_sock = self.ftp.transfercmd(f"RETR {filename}")
+            data_sock.settimeout(3600)
+
+            logger.info("Starting upload to Azure (this may take 30+ minutes for large files)...")
+
+            # Keep the idle control connection alive while the data socket is busy
+            heartbeat = threading.Thread(target=self._send_noops, args=(stop_heartbeat,), daemon=True)
+            heartbeat.start()
+
+            # Stream to Azure
+            with data_sock.makefile("rb", buffering=TRANSFER_BLOCK_SIZE) as fp:
+                blob_client.upload_blob(
+                    data=fp,
+                    length=size,
+                    overwrite=True,
+                    blob_type="BlockBlob",
+                    metadata=metadata,
+                    max_concurrency=4
+                )
+
+            # Close data socket - upload succeeded if we reach here
+            data_sock.close()
+            data_sock = None
+
+            stop_heartbeat.set()
+            heartbeat.join()
+
+            # Consume the 226 plus one reply per NOOP sent, so the control
+            # connection is ready for the next command
+            for _ in range(1 + self._noops_sent):
+                self.ftp.voidresp()
+
+            logger.info("✓ Uploaded FTP file to blob %s", blob_client.blob_name)
+
+        except Exception as e:
+            logger.error("Failed to stream %s: %s", filename, e)
+            raise
+
+        finally:
+            stop_heartbeat.set()
+            if data_sock:
+                try:
+                    data_sock.close()
+                except Exception:
+                    pass
+
+    def _send_noops(self, stop: threading.Event) -> None:
+        # Replies are left on the control connection and drained after the
+        # transfer: reading them here would race the 226 for the socket.
+        while not stop.wait(NOOP_INTERVAL):
+            try:
+                self.ftp.sock.sendall(b"NOOP\r\n")
+            except OSError as e:
+                logger.warning("NOOP heartbeat to %s failed: %s", self.host, e)
+                return
+            self._noops_sent += 1
+
 def split_host_and_path(host_with_path: str) -> tuple[str, str]:
     parts = host_with_path.split("/", 1)
     host = parts[0]
     path = "/" + parts[1] if len(parts) > 1 else "/"
     return host, path
 
-def get_ftp_last_modified(host: str, path: str, filename: str) -> str | None:
-    ftp = connect_ftp(host)
-    ftp.cwd(path)
+def compile_rules(
+    extensions: list[str] | None = None,
+    name_contains: list[str] | None = None,
+    exclude: list[str] | None = None,
+) -> Callable[[str], bool]:
+    """
+    Turn a host's file_rules into a single case-insensitive predicate. Rules are
+    lowercased once per host: extensions become one suffix tuple for a single
+    endswith() call, token lists become one regex each.
+    """
+    def alternation(tokens: list[str]) -> re.Pattern:
+        return re.compile("|".join(re.escape(token.lower()) for token in tokens))
+
+    exclude_re = alternation(exclude) if exclude else None
+    suffixes = tuple(f".{ext.lower()}" for ext in extensions) if extensions else None
+    include_re = alternation(name_contains) if name_contains else None
+
+    def matches(filename: str) -> bool:
+        name = filename.lower()
+        if exclude_re and exclude_re.search(name):
+            return False
+        if suffixes and not name.endswith(suffixes):
+            return False
+        if include_re and not include_re.search(name):
+            return False
+        return True
+
+    return matches
+
+def mdtm_to_version(timestamp: str) -> str:
+    # YYYYMMDDHHMMSS -> YYYY-MM-DD
+    return f"{timestamp[0:4]}-{timestamp[4:6]}-{timestamp[6:8]}"
+
+def uploaded_mdtm(blob_client: BlobClient) -> str | None:
+    """
+    FTP modification time recorded on a previously uploaded blob, if any.
+    """
     try:
-        response = ftp.sendcmd(f"MDTM {filename}")
-        timestamp = response.split()[1]
-        last_modified = datetime.strptime(timestamp, "%Y%m%d%H%M%S")
-        return last_modified.strftime("%Y%m%d%H%M%S")
-    except Exception as e:
-        print(e)
+        return blob_client.get_blob_properties().metadata.get(FTP_MDTM_METADATA_KEY)
+    except ResourceNotFoundError:
         return None
-    finally:
-        ftp.quit()
 
-def matches_rules(
+def process_file(
+    source_id: str,
+    container: ContainerClient,
+    session: FTPSession,
     filename: str,
-    extensions: list[str] | None = None,
-    name_contains: list[str] | None = None,
-    exclude: list[str] | None = None,
-) -> bool:
-    if exclude and any(token in filename for token in exclude):
-        return False
+    last_modified_ts: str | None,
+    root_prefix: str,
+    version: str,
+) -> str | None:
+    """
+    Stream one FTP file to the bronze container over the worker's session, under
+    the source's latest/{version}/ folder.
+
+    Returns the blob name, or None when the file was skipped.
+    """
+    if not last_modified_ts:
+        logger.warning("Skipping %s (cannot determine last-modified)", filename)
+        return None
 
-    if extensions and not any(filename.endswith(f".{ext}") for ext in extensions):
-        return False
+    blob_name = (
+        f"raw/{source_id}/latest/{version}/"
+        f"{root_prefix}{filename}"
+    )
 
-    if name_contains and not any(token in filename for token in name_contains):
-        return False
+    blob_client = container.get_blob_client(blob_name)
+    if uploaded_mdtm(blob_client) == last_modified_ts:
+        logger.info("%s already uploaded to %s; skipping transfer.", filename, blob_name)
+        return blob_name
 
-    return True
+    session.retr_to_blob(
+        filename,
+        blob_client,
+        metadata={FTP_MDTM_METADATA_KEY: last_modified_ts},
+    )
 
-def list_ftp_files(host: str, path: str) -> list[str]:
-    ftp = connect_ftp(host)
-    ftp.cwd(path)
-    files = ftp.nlst()
-    ftp.quit()
-    return files
+    return blob_name
+
+def list_host(host_cfg: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    List one host folder and resolve the modification time of its matching files
+    over a single control connection.
+
+    Returns the listing (host, path, root_prefix, files, last_modified) used by
+    transfer_host, or None when nothing in the folder matches the rules. Listing
+    errors are raised: deciding the source version without a host could move its
+    current files out of latest/.
+    """
+    host_with_path = host_cfg["host"]
+    file_rules = host_cfg.get("file_rules", {})
+
+    extensions = file_rules.get("extensions")
+    name_contains = file_rules.get("name_contains")
+    exclude = file_rules.get("exclude")
+    root = file_rules.get("root")
+
+    matches = compile_rules(
+        extensions=extensions,
+        name_contains=name_contains,
+        exclude=exclude,
+    )
 
-def run_ftp_source(source_id: str, source_cfg: Dict) -> None:
-    logger.info("Starting %s data synchronization workflow.", source_id.upper())
+    host, path = split_host_and_path(host_with_path)
 
-    blob_client = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
-    container = blob_client.get_container_client(BRONZE_CONTAINER)
+    logger.info("Connecting to FTP host: %s", host)
+    logger.info("Analyzing folder: %s", path)
 
-    update_ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H:%M:%S")
+    try:
+        with FTPSession(host, path) as session:
+            listing = session.list_with_mtime()
 
-    all_blob_paths: list[str] = []
-    used_hosts: set[str] = set()
-    detected_versions: set[str] = set()
+            matching_files = [f for f in listing if matches(f)]
 
-    for host_cfg in source_cfg:
-        host_with_path = host_cfg["host"]
-        file_rules = host_cfg.get("file_rules", {})
+            last_modified = {f: listing[f] for f in matching_files}
+            missing = [f for f, ts in last_modified.items() if not ts]
+            if missing:
+                last_modified.update(session.mdtm_batch(missing))
+    except Exception as e:
+        logger.error("Failed to list files on %s%s: %s", host, path, e)
+        raise
 
-        extensions = file_rules.get("extensions")
-        name_contains = file_rules.get("name_contains")
-        exclude = file_rules.get("exclude")
-        root = file_rules.get("root")
-        root_prefix = root.strip("/") + "/" if root else ""
-        
-        host, path = split_host_and_path(host_with_path)
-        used_hosts.add(host_with_path.rstrip("/"))
+    if not matching_files:
+        logger.info("No matching files found in %s%s", host, path)
+        return None
 
-        logger.info("Connecting to FTP host: %s", host)
-        logger.info("Analyzing folder: %s", path)
+    return {
+        "host": host,
+        "path": path,
+        "root_prefix": root.strip("/") + "/" if root else "",
+        "files": matching_files,
+        "last_modified": last_modified,
+        "connections": min(
+            host_cfg.get("connections_per_host", DEFAULT_CONNECTIONS_PER_HOST),
+            len(matching_files),
+        ),
+    }
+
+def transfer_host(
+    source_id: str,
+    container: ContainerClient,
+    host_listing: Dict[str, Any],
+    version: str,
+) -> list[str]:
+    """
+    Transfer the matching files of one listed host folder in parallel.
+
+    Each transfer worker logs in once and reuses its session for all the files
+    it picks up. Returns the uploaded blob names in listing order.
+    """
+    host = host_listing["host"]
+    path = host_listing["path"]
+    last_modified = host_listing["last_modified"]
+
+    pending: queue.Queue[str] = queue.Queue()
+    for filename in host_listing["files"]:
+        pending.put(filename)
+
+    def transfer_worker() -> dict[str, str]:
+        uploaded = {}
+        # Hold a process-wide slot for the whole session so hosts x connections
+        # cannot oversubscribe the node's bandwidth.
+        with TRANSFER_SLOTS, FTPSession(host, path, timeout=3600*24) as session:
+            while True:
+                try:
+                    filename = pending.get_nowait()
+                except queue.Empty:
+                    return uploaded
+                blob_name = process_file(
+                    source_id,
+                    container,
+                    session,
+                    filename,
+                    last_modified[filename],
+                    host_listing["root_prefix"],
+                    version,
+                )
+                if blob_name:
+                    uploaded[filename] = blob_name
+
+    connections = host_listing["connections"]
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        futures = [pool.submit(transfer_worker) for _ in range(connections)]
+        uploaded = {}
+        for future in futures:
+            uploaded.update(future.result())
+
+    # Keep the listing order for the manifest file list.
+    return [uploaded[f] for f in host_listing["files"] if f in uploaded]
 
-        try:
-            filenames = list_ftp_files(host, path)
-        except Exception as e:
-            logger.error("Failed to list files on %s%s: %s", host, path, e)
-            continue
-
-        matching_files = [
-            f for f in filenames
-            if matches_rules(
-                f,
-                extensions=extensions,
-                name_contains=name_contains,
-                exclude=exclude,
-            )
-        ]
-
-        if not matching_files:
-            logger.info("No matching files found in %s%s", host, path)
-            continue
-
-        for filename in matching_files:
-            last_modified_ts = get_ftp_last_modified(host, path, filename)
-            if not last_modified_ts:
-                logger.warning("Skipping %s (cannot determine last-modified)", filename)
-                continue
-
-            version = datetime.strptime(
-                last_modified_ts, "%Y%m%d%H%M%S"
-            ).strftime("%Y-%m-%d")
-
-            detected_versions.add(version)
-            
-            stored_ts = extract_version(source_id, container, logger)
-            if not is_newer_version(version, stored_ts):
-                logger.info("%s up to date.", filename)
-                sys.exit(0)
-
-            blob_name = (
-                f"raw/{source_id}/latest/{version}/"
-                f"{root_prefix}{filename}"
-            )
-            
-            ftp_stream_to_blob(
-                host=host,
-                path=path,
-                filename=filename,
-                container_client=container,
-                blob_path=blob_name,
-            )
+def run_ftp_source(source_id: str, source_cfg: Dict) -> None:
+    logger.info("Starting %s data synchronization workflow.", source_id.upper())
+
+    # Block sizes are client-level settings, inherited by every blob client below.
+    blob_client = create_blob_service_client(
+        BLOB_CONNECTION_STRING,
+        max_block_size=TRANSFER_BLOCK_SIZE,
+        max_single_put_size=MAX_SINGLE_PUT_SIZE,
+    )
+    container = blob_client.get_container_client(BRONZE_CONTAINER)
 
-            all_blob_paths.append(blob_name)
+    update_ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H:%M:%S")
 
-    if not detected_versions:
+    all_blob_paths: list[str] = []
+    used_hosts: set[str] = {host_cfg["host"].rstrip("/") for host_cfg in source_cfg}
+
+    # One manifest read per run.
+    stored_ts = extract_version(source_id, container, logger)
+
+    # Every host is listed before anything is transferred: the source has a single
+    # version, the newest matching file across all of its hosts.
+    with ThreadPoolExecutor(max_workers=max(1, len(source_cfg))) as pool:
+        host_listings = [listing for listing in pool.map(list_host, source_cfg) if listing]
+
+    known = [
+        ts
+        for listing in host_listings
+        for ts in listing["last_modified"].values()
+        if ts
+    ]
+    if not known:
         logger.info("No updates detected for source %s", source_id)
         return
 
-    # Resolve single authoritative version
-    version = sorted(detected_versions)[-1]
+    version = mdtm_to_version(max(known))
+    if not is_newer_version(version, stored_ts):
+        logger.info("%s up to date (version %s).", source_id, version)
+        return
 
-    update_manifest(
-        container=container,
-        source_id=source_id,
-        version=version,
-        update_ts=update_ts,
-        hosts=sorted(used_hosts),
-        list_of_files=all_blob_paths,
-        logger=logger,
-    )
-    
-    update_latest_folder(
-        container=container,
-        source_id=source_id,
-        version=version,
-        logger=logger
-    )
+    # Hosts are independent; map() keeps their order in the manifest file list.
+    with ThreadPoolExecutor(max_workers=len(host_listings)) as pool:
+        for blob_paths in pool.map(
+            lambda listing: transfer_host(source_id, container, listing, version),
+            host_listings,
+        ):
+            all_blob_paths.extend(blob_paths)
+
+    if not all_blob_paths:
+        logger.warning("No files transferred for source %s", source_id)
+        return
+
+    # The manifest entry is written once, after the latest/ folder is in place.
+    with ManifestBatch(container, logger) as batch:
+        update_manifest(
+            container=container,
+            source_id=source_id,
+            version=version,
+            update_ts=update_ts,
+            hosts=sorted(used_hosts),
+            list_of_files=all_blob_paths,
+            logger=logger,
+            batch=batch,
+        )
+
+        update_latest_folder(
+            container=container,
+            source_id=source_id,
+            version=version,
+            logger=logger
+        )
     
     extract(
         source_id=source_id,
@@ -299,8 +553,7 @@ def run_ftp_source(source_id: str, source_cfg: Dict) -> None:
 def load_sources_config(config_path: Path) -> Dict[str, Dict[str, Any]]:
     if not config_path.exists():
         raise FileNotFoundError(f"Sources configuration not found at {config_path}")
-    with config_path.open("r", encoding="utf-8") as handle:
-        document = yaml.safe_load(handle) or {}
+    document = load_sources_document(config_path)
     ftp_sources = document["sources"]["ftp"]
     if not isinstance(ftp_sources, dict):
         raise ValueError("The 'sources' section in sources.yaml must be a mapping.")
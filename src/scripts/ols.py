@@ -8,7 +8,7 @@ from typing import Tuple
 from urllib.parse import urlparse
 from datetime import datetime, timezone
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
+from azure.storage.blob import ContainerClient
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
@@ -26,6 +26,7 @@ from env.config import (
 )
 
 from utils.data import (
+    create_blob_service_client,
     download_owl
 )
 
@@ -44,6 +45,8 @@ logging.basicConfig()
 logging.root.setLevel(logging.INFO)
 logger = logging.getLogger("OLS")
 
+OWL_BLOCK_SIZE = 8 * 1024 * 1024
+
 def fetch_version_metadata(endpoint: str, ontology_id: str) -> Tuple[str, str]:
     endpoint = f"{endpoint}/{ontology_id}"
     response = requests.get(endpoint, timeout=30)
@@ -78,7 +81,11 @@ def run(ontology_id: str) -> None:
     fileLocation, version_marker = fetch_version_metadata(endpoint, ontology_id)
     filename = fileLocation.split("/")[-1]
     # Run if newer version identified
-    blob_client = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
+    blob_client = create_blob_service_client(
+        BLOB_CONNECTION_STRING,
+        max_block_size=OWL_BLOCK_SIZE,
+        max_single_put_size=OWL_BLOCK_SIZE,
+    )
     container = blob_client.get_container_client(BRONZE_CONTAINER)
     
     if should_run(ontology_id, endpoint, container):
@@ -1,18 +1,24 @@
+import re
+import orjson
 import requests
 import sys
 import logging
 
 from pathlib import Path
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from datetime import datetime, timezone
-from typing import Tuple, Optional
+from email.utils import parsedate_to_datetime
+from typing import Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from azure.storage.blob import BlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import ContainerClient
 
 
 PC2_BASE_URL = "https://download.baderlab.org/PathwayCommons/PC2/"
 TARGET_FILENAME = "pc-hgnc.txt.gz"
+PROBE_CACHE_BLOB = "raw/pathway_commons/_probe_cache.json"
+PC2_VERSION_HREF = re.compile(rb"""href=["']/?(v\d+)/?["']""")
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
@@ -30,6 +36,9 @@ from extractor import (
     extract
 )
 
+from utils.data import create_blob_service_client
+from utils.sessions import create_session
+
 from utils.versioning import (
     update_latest_folder,
     update_manifest,
@@ -40,7 +49,58 @@ from utils.versioning import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("API")
 
-CHUNK_SIZE = 8 * 1024 * 1024
+PROBE_WORKERS = 32
+UPLOAD_CONCURRENCY = 8
+
+blob_service = create_blob_service_client(BLOB_CONNECTION_STRING)
+container = blob_service.get_container_client(BRONZE_CONTAINER)
+
+session = create_session(pool_connections=1, pool_maxsize=PROBE_WORKERS)
+
+def parse_last_modified(lm: str) -> datetime:
+    last_modified = parsedate_to_datetime(lm)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified
+
+def probe_last_modified(
+    session: requests.Session,
+    file_url: str,
+    timeout: Optional[int],
+) -> Optional[str]:
+    """
+    HEAD a version's file and return its raw Last-Modified header, or None when
+    the file is missing or the header is absent.
+    """
+    try:
+        head = session.head(file_url, allow_redirects=True, timeout=timeout)
+        if head.status_code != 200:
+            return None
+
+        return head.headers.get("Last-Modified") or None
+
+    except requests.RequestException:
+        return None
+
+def load_probe_cache(container: ContainerClient) -> Dict[str, str]:
+    """
+    Last-Modified headers of already probed versions ({version: header}).
+    Published PC2 versions never change, so they are only HEADed once.
+    """
+    try:
+        data = container.get_blob_client(PROBE_CACHE_BLOB).download_blob().readall()
+        return orjson.loads(data)
+    except ResourceNotFoundError:
+        return {}
+    except Exception as exc:
+        logger.warning("Ignoring unreadable probe cache %s: %s", PROBE_CACHE_BLOB, exc)
+        return {}
+
+def save_probe_cache(container: ContainerClient, cache: Dict[str, str]) -> None:
+    container.get_blob_client(PROBE_CACHE_BLOB).upload_blob(
+        orjson.dumps(cache, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS),
+        overwrite=True,
+    )
 
 def download_latest_pc2_hgnc(
     timeout: Optional[int] = 30,
@@ -53,69 +113,74 @@ def download_latest_pc2_hgnc(
         (selected_version, last_modified_utc)
     """
 
-    session = requests.Session()
+    # The Azure lookups don't depend on PC2: run them while the index is fetched.
+    with ThreadPoolExecutor(max_workers=2) as lookups:
+        stored_future = lookups.submit(
+            extract_version, "pathway_commons", container=container, logger=logger
+        )
+        cache_future = lookups.submit(load_probe_cache, container)
 
-    # ------------------------------------------------------------------
-    # 1) Discover candidate versions (HTML used only for link discovery)
-    # ------------------------------------------------------------------
-    resp = session.get(PC2_BASE_URL, timeout=timeout)
-    resp.raise_for_status()
+        # ------------------------------------------------------------------
+        # 1) Discover candidate versions (HTML used only for link discovery)
+        # ------------------------------------------------------------------
+        resp = session.get(PC2_BASE_URL, timeout=timeout)
+        resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+        # Plain autoindex listing: the version folders are the only v<N>/ links
+        versions: list[str] = [
+            match.group(1).decode() for match in PC2_VERSION_HREF.finditer(resp.content)
+        ]
 
-    versions: list[str] = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip("/")
-        if href.startswith("v") and href[1:].isdigit():
-            versions.append(href)
+        if not versions:
+            raise RuntimeError("No PC2 version folders found")
 
-    if not versions:
-        raise RuntimeError("No PC2 version folders found")
+        stored_version = stored_future.result()
+        probe_cache = cache_future.result()
 
     # ------------------------------------------------------------------
-    # 2) Probe each version via HEAD and extract Last-Modified
+    # 2) Probe versions newer than the cached ones concurrently via HEAD
+    #    and keep the newest Last-Modified
     # ------------------------------------------------------------------
-    best_version: Optional[str] = None
-    best_last_modified: Optional[datetime] = None
-    best_file_url: Optional[str] = None
-
-    for version in versions:
-        file_url = urljoin(PC2_BASE_URL, f"{version}/{TARGET_FILENAME}")
-
-        try:
-            head = session.head(file_url, allow_redirects=True, timeout=timeout)
-            if head.status_code != 200:
-                continue
-
-            lm = head.headers.get("Last-Modified")
-            if not lm:
-                continue
-
-            last_modified = datetime.strptime(
-                lm, "%a, %d %b %Y %H:%M:%S %Z"
-            ).replace(tzinfo=timezone.utc)
-
-            if (
-                best_last_modified is None
-                or last_modified > best_last_modified
-            ):
-                best_version = version
-                best_last_modified = last_modified
-                best_file_url = file_url
-
-        except requests.RequestException:
-            continue
-        
-    date_str = best_last_modified.strftime("%Y-%m-%d") # type: ignore
-    blob_path = f"raw/pathway_commons/latest/{date_str}/{TARGET_FILENAME}"
-    
-    blob_client = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
-    container = blob_client.get_container_client(BRONZE_CONTAINER)
-    stored_version = extract_version("pathway_commons", 
-                                     container=container,
-                                     logger=logger)
-    
-    if is_newer_version(remote=stored_version, local=date_str):
+    max_cached = max((int(v[1:]) for v in probe_cache), default=-1)
+    new_versions = [v for v in versions if int(v[1:]) > max_cached]
+
+    file_urls = {
+        version: urljoin(PC2_BASE_URL, f"{version}/{TARGET_FILENAME}")
+        for version in versions
+    }
+
+    if new_versions:
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(new_versions))) as pool:
+            futures = {
+                pool.submit(probe_last_modified, session, file_urls[version], timeout): version
+                for version in new_versions
+            }
+            probed = {
+                futures[future]: future.result()
+                for future in as_completed(futures)
+            }
+
+        probed = {version: lm for version, lm in probed.items() if lm}
+        if probed:
+            probe_cache.update(probed)
+            save_probe_cache(container, probe_cache)
+
+    candidates = [
+        (parse_last_modified(lm), int(version[1:]), version)
+        for version, lm in probe_cache.items()
+        if version in file_urls
+    ]
+    if not candidates:
+        raise RuntimeError(f"No PC2 version provides {TARGET_FILENAME}")
+
+    # Ties go to the higher version number
+    best_last_modified, _, best_version = max(candidates)
+    best_file_url = file_urls[best_version]
+
+    version_str = best_last_modified.strftime("%Y-%m-%d")
+    blob_path = f"raw/pathway_commons/latest/{version_str}/{TARGET_FILENAME}"
+
+    if not is_newer_version(remote=version_str, local=stored_version):
         logging.info("Pathway Commons data up to date.")
         sys.exit(0)
     
@@ -123,12 +188,15 @@ def download_latest_pc2_hgnc(
         blob=blob_path,
     )
 
-    with session.get(best_file_url, stream=True, timeout=timeout) as r: # type: ignore
+    with session.get(best_file_url, stream=True, timeout=timeout) as r:
         r.raise_for_status()
+        r.raw.decode_content = True
 
+        # The SDK reads whole blocks straight off the urllib3 response
         blob_client.upload_blob(
-            data=r.iter_content(chunk_size=CHUNK_SIZE),
+            data=r.raw,
             overwrite=True,
+            max_concurrency=UPLOAD_CONCURRENCY,
         )
     
     timestamp = datetime.now().strftime("%Y-%m-%d")
@@ -136,9 +204,9 @@ def download_latest_pc2_hgnc(
     update_manifest(
         container=container,
         source_id="pathway_commons",
-        version=datetime.strftime(best_last_modified, "%Y-%m-%d"), # type: ignore
+        version=version_str,
         update_ts=timestamp,
-        hosts=[f"{PC2_BASE_URL}{best_version}"], # type: ignore
+        hosts=[f"{PC2_BASE_URL}{best_version}"],
         list_of_files = [blob_path],
         logger=logger
     )
@@ -146,7 +214,7 @@ def download_latest_pc2_hgnc(
     update_latest_folder(
         source_id="pathway_commons",
         container=container,
-        version=datetime.strftime(best_last_modified, "%Y-%m-%d"), # type: ignore
+        version=version_str,
         logger=logger
     )
 
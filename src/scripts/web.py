@@ -1,17 +1,25 @@
 import argparse
-import yaml
+import os
 import requests
+import tempfile
+import re
 import sys
 import logging
 import hashlib
+import queue
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict
 from datetime import datetime, timezone
+from email.utils import format_datetime
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobClient
 
-from azure.storage.blob import BlobServiceClient
 
 # =========================
 # Paths & imports
@@ -33,6 +41,10 @@ from utils.versioning import (
     update_latest_folder
 )
 
+from utils.sources import load_sources_document
+from utils.data import create_blob_service_client
+from utils.sessions import create_session
+
 from env.config import (
     BRONZE_CONTAINER,
     BLOB_CONNECTION_STRING
@@ -43,6 +55,7 @@ from extractor import (
 )
 
 from utils.page_utils import (
+    HTML_PARSER,
     HPA_parse_version_from_page,
     MarkerDB_parse_version_from_page,
     FooDB_parse_version_from_page,
@@ -86,97 +99,224 @@ logger = logging.getLogger("WEB")
 # Azure Blob
 # =========================
 
-blob_service = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_SINGLE_PUT_SIZE = CHUNK_SIZE
+UPLOAD_CONCURRENCY = 8
+SHA256_METADATA_KEY = "sha256"
+HASH_QUEUE_DEPTH = 2
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+_END_OF_STREAM = object()
+
+# Blocks match the download chunk size so each chunk is staged as one block
+blob_service = create_blob_service_client(
+    BLOB_CONNECTION_STRING,
+    max_block_size=CHUNK_SIZE,
+    max_single_put_size=MAX_SINGLE_PUT_SIZE,
+)
 container = blob_service.get_container_client(BRONZE_CONTAINER)
 
 # =========================
 # HTTP Session (Level-1 improvement)
 # =========================
 
-session = requests.Session()
+# Files downloaded concurrently per page. Each in-flight file holds at most
+# UPLOAD_CONCURRENCY blocks plus HASH_QUEUE_DEPTH chunks waiting to be hashed,
+# which bounds memory to WEB_CC * (UPLOAD_CONCURRENCY + HASH_QUEUE_DEPTH) * CHUNK_SIZE.
+WEB_CC = int(os.getenv("WEB_CC", "4"))
+
+session = create_session(pool_connections=WEB_CC, pool_maxsize=WEB_CC * 2)
 session.headers.update({
     "User-Agent": "bronze-layer-ingestion/1.0"
 })
 
-CHUNK_SIZE = 8 * 1024 * 1024
-
 # =========================
 # Helpers
 # =========================
 
-def matches_rules(url: str, rules: dict) -> bool:
-    filename = Path(urlparse(url).path).name.lower()
-    if not filename:
-        return False
-
+def compile_rules(rules: dict) -> Callable[[str], bool]:
+    """
+    Turn a page's file_rules into a predicate over candidate URLs. Rules are
+    prepared once per page: extensions become one suffix tuple, name tokens are
+    lowercased once and, in 'or' mode, joined into a single regex.
+    """
+    suffixes = None
     if "extensions" in rules:
-        if not any(filename.endswith(f".{ext}") for ext in rules["extensions"]):
+        suffixes = tuple(f".{ext}" for ext in rules["extensions"])
+
+    tokens = tuple(t.lower() for t in rules.get("name_contains", []))
+    mode = rules.get("name_contains_mode", "or").lower()
+    if tokens and mode not in ("and", "or"):
+        raise ValueError(
+            f"Invalid name_contains_mode '{mode}'. "
+            "Expected 'and' or 'or'."
+        )
+    pattern = re.compile("|".join(re.escape(token) for token in tokens)) if tokens else None
+
+    def matches(url: str) -> bool:
+        filename = Path(urlparse(url).path).name.lower()
+        if not filename:
+            return False
+
+        if suffixes is not None and not filename.endswith(suffixes):
             return False
 
-    if "name_contains" in rules:
-        tokens = [t.lower() for t in rules["name_contains"]]
-        
         # Only apply name filtering if tokens list is not empty
         if tokens:
-            mode = rules.get("name_contains_mode", "or").lower()
-
             if mode == "and":
-                if not any(token in filename for token in tokens) and not any(token in url for token in tokens):
+                if not all(token in filename or token in url for token in tokens):
                     return False
+            elif not pattern.search(filename) and not pattern.search(url):  # type: ignore
+                return False
 
-            elif mode == "or":
-                if not any(token in filename for token in tokens) and not any(token in url for token in tokens):
-                    return False
+        return True
 
-            else:
-                raise ValueError(
-                    f"Invalid name_contains_mode '{mode}'. "
-                    "Expected 'and' or 'or'."
-                )
+    return matches
 
-    return True
 
+def _upload_whole(r: requests.Response, blob_client: BlobClient) -> str:
+    """
+    Read a small response of known length in one go and store it, with its
+    digest as metadata, in a single put.
+    Returns SHA256 hash.
+    """
+    data = r.content
+    digest = hashlib.sha256(data).hexdigest()
+
+    blob_client.upload_blob(
+        data,
+        length=len(data),
+        metadata={SHA256_METADATA_KEY: digest},
+        overwrite=True
+    )
 
-def stream_to_blob(url: str, blob_name: str) -> str:
+    return digest
+
+
+def _upload_streamed(r: requests.Response, blob_client: BlobClient, length: int) -> str:
     """
-    Stream HTTP content directly into Azure Blob.
+    Pipe a response of known length into the blob while it downloads.
     Returns SHA256 hash.
     """
-    blob_client = container.get_blob_client(blob_name)
     sha256 = hashlib.sha256()
 
-    with session.get(url, stream=True, timeout=300) as r:
-        r.raise_for_status()
+    # Hash on a side thread so the SDK's reader hands chunks to the upload
+    # workers without waiting on sha256.update (which releases the GIL).
+    pending = queue.Queue(maxsize=HASH_QUEUE_DEPTH)
+
+    def hash_chunks():
+        while (chunk := pending.get()) is not _END_OF_STREAM:
+            sha256.update(chunk)
 
-        def gen():
-            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):  # 64 KB
-                if chunk:
-                    sha256.update(chunk)
-                    yield chunk
+    hasher = threading.Thread(target=hash_chunks, daemon=True)
+    hasher.start()
 
+    def gen():
+        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                pending.put(chunk)
+                yield chunk
+
+    try:
         blob_client.upload_blob(
             data=gen(),
+            length=length,
             overwrite=True,
-            max_concurrency=4
+            max_concurrency=UPLOAD_CONCURRENCY
         )
+    finally:
+        pending.put(_END_OF_STREAM)
+        hasher.join()
+
+    digest = sha256.hexdigest()
+    blob_client.set_blob_metadata({SHA256_METADATA_KEY: digest})
+    return digest
+
+
+def _upload_spooled(r: requests.Response, blob_client: BlobClient) -> str:
+    """
+    Buffer a response of unknown length (RAM up to SPOOL_MAX_SIZE, disk beyond)
+    so the upload gets an exact length: small files go out as a single put and
+    the digest is stored with the blob in the same request.
+    Returns SHA256 hash.
+    """
+    sha256 = hashlib.sha256()
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                sha256.update(chunk)
+                spool.write(chunk)
+
+        length = spool.tell()
+        spool.seek(0)
+
+        digest = sha256.hexdigest()
+        blob_client.upload_blob(
+            spool,
+            length=length,
+            metadata={SHA256_METADATA_KEY: digest},
+            overwrite=True,
+            max_concurrency=UPLOAD_CONCURRENCY
+        )
+
+    return digest
 
-    return sha256.hexdigest()
+
+def stream_to_blob(url: str, blob_name: str) -> str:
+    """
+    Stream HTTP content directly into Azure Blob.
+    Returns SHA256 hash.
+
+    When the blob already exists (e.g. a rerun of the same version), the GET is
+    conditional on the source having changed since that upload.
+    """
+    blob_client = container.get_blob_client(blob_name)
+
+    headers = {}
+    existing = None
+    try:
+        existing = blob_client.get_blob_properties()
+        headers["If-Modified-Since"] = format_datetime(existing.last_modified, usegmt=True)
+    except ResourceNotFoundError:
+        pass
+
+    with session.get(url, stream=True, timeout=300, headers=headers) as r:
+        if r.status_code == 304:
+            logger.info("= %s unchanged since last upload", Path(blob_name).name)
+            return existing.metadata.get(SHA256_METADATA_KEY, "")  # type: ignore
+
+        r.raise_for_status()
+
+        # Content-Length only describes the body we upload when requests is
+        # not decoding a Content-Encoding on the fly
+        length = None
+        if r.headers.get("Content-Encoding", "identity") == "identity":
+            length = int(r.headers.get("Content-Length", 0)) or None
+
+        if length is None:
+            return _upload_spooled(r, blob_client)
+        if length <= MAX_SINGLE_PUT_SIZE:
+            return _upload_whole(r, blob_client)
+        return _upload_streamed(r, blob_client, length)
 
 
 def process_page(page_cfg: dict, source_id: str, version: str):
     page_url = page_cfg["web_page"]
     tag = page_cfg.get("tag", "a")
-    rules = page_cfg.get("file_rules", {})
+    matches_rules = compile_rules(page_cfg.get("file_rules", {}))
 
     logger.info("PAGE %s", page_url)
 
     r = session.get(page_url, timeout=60)
     r.raise_for_status()
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = BeautifulSoup(r.content, HTML_PARSER, parse_only=SoupStrainer(tag, href=True))
     elements = soup.find_all(tag)
 
-    downloaded = []
+    # blob name -> url, first link wins; listings often link a file twice
+    # (icon and text), and two workers must never upload the same blob.
+    jobs: Dict[str, str] = {}
 
     for el in elements:
         href = el.get("href")
@@ -184,18 +324,24 @@ def process_page(page_cfg: dict, source_id: str, version: str):
             continue
 
         full_url = urljoin(page_url, href)
-        if not matches_rules(full_url, rules):
+        if not matches_rules(full_url):
             continue
 
         filename = Path(urlparse(full_url).path).name
         blob_name = f"raw/{source_id}/latest/{version}/{filename}"
+        jobs.setdefault(blob_name, full_url)
+
+    if not jobs:
+        return []
 
-        logger.info("↓ %s", filename)
-        stream_to_blob(full_url, blob_name)
+    for blob_name in jobs:
+        logger.info("↓ %s", Path(blob_name).name)
 
-        downloaded.append(blob_name)
+    # map() yields in submission order, so the file list follows the page.
+    with ThreadPoolExecutor(max_workers=min(WEB_CC, len(jobs))) as executor:
+        list(executor.map(stream_to_blob, jobs.values(), jobs.keys()))
 
-    return downloaded
+    return list(jobs)
 
 
 def main():
@@ -207,8 +353,7 @@ def main():
     )
     args = parser.parse_args()
 
-    with open(CONFIG_PATH) as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_sources_document(CONFIG_PATH)
 
     web_sources = cfg["sources"].get("web", {})
     if args.id not in web_sources:
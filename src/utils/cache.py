@@ -0,0 +1,43 @@
+import threading
+import time
+
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+def cached(ttl: float, key: Callable[..., Hashable]) -> Callable:
+    """
+    Per-process memoization with a time-to-live.
+
+    key(*args, **kwargs) maps a call to its cache slot. The wrapped function gains
+    invalidate(*args, **kwargs) to drop a slot and prime(value, *args, **kwargs)
+    to seed it (e.g. with what was just written). Exceptions are not cached.
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: Dict[Hashable, Tuple[float, Any]] = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            slot = key(*args, **kwargs)
+            with lock:
+                hit = entries.get(slot)
+            if hit is not None and hit[0] > time.monotonic():
+                return hit[1]
+
+            value = func(*args, **kwargs)
+            with lock:
+                entries[slot] = (time.monotonic() + ttl, value)
+            return value
+
+        def invalidate(*args, **kwargs) -> None:
+            with lock:
+                entries.pop(key(*args, **kwargs), None)
+
+        def prime(value, *args, **kwargs) -> None:
+            with lock:
+                entries[key(*args, **kwargs)] = (time.monotonic() + ttl, value)
+
+        wrapper.invalidate = invalidate
+        wrapper.prime = prime
+        return wrapper
+    return decorator
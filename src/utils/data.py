@@ -1,31 +1,143 @@
-import json
+import copy
 import logging
 import time
+import orjson
 import requests
 
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Tuple, List
+from typing import Callable, Dict, Iterable, Optional, Tuple, List
 from urllib.parse import urlparse
 
+from requests.adapters import HTTPAdapter
+
 from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, BlobProperties
-from azure.core.exceptions import ResourceNotFoundError
+from azure.core import MatchConditions
+from azure.core.pipeline.transport import RequestsTransport
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+from utils.cache import cached
+from utils.retry import retry
+
+MANIFEST_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+MANIFEST_CACHE_TTL = 60  # seconds
+BLOB_POOL_MAXSIZE = 64
+OWL_UPLOAD_CONCURRENCY = 8
+
 
+def create_blob_service_client(
+    connection_string: str,
+    pool_maxsize: int = BLOB_POOL_MAXSIZE,
+    **kwargs,
+) -> BlobServiceClient:
+    """
+    BlobServiceClient whose HTTP transport keeps up to `pool_maxsize` connections
+    alive, so parallel block uploads are not throttled by the default pool of 10.
+    Extra kwargs (e.g. max_block_size) are passed to the client configuration.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return BlobServiceClient.from_connection_string(
+        connection_string,
+        transport=RequestsTransport(session=session, session_owner=False),
+        **kwargs,
+    )
 
 def create_blob_client(container: ContainerClient, path: str) -> BlobClient:
     return container.get_blob_client(path)
 
-def load_manifest(blob_client: BlobClient, logger: logging.Logger) -> dict:
+# Last manifest seen per blob URL with its ETag. Once the TTL cache lapses, the
+# manifest is revalidated against it instead of being downloaded again.
+_manifest_etags: Dict[str, Tuple[str, dict]] = {}
+
+def _remember_manifest(blob_client: BlobClient, etag: Optional[str], manifest: dict) -> None:
+    if etag:
+        _manifest_etags[blob_client.url] = (etag, manifest)
+
+@cached(ttl=MANIFEST_CACHE_TTL, key=lambda blob_client, logger: blob_client.url)
+def _fetch_manifest(blob_client: BlobClient, logger: logging.Logger) -> dict:
+    known = _manifest_etags.get(blob_client.url)
     try:
-        data = blob_client.download_blob().readall()
-        return json.loads(data)
+        if known:
+            downloader = blob_client.download_blob(etag=known[0], match_condition=MatchConditions.IfModified)
+        else:
+            downloader = blob_client.download_blob()
     except ResourceNotFoundError:
+        _manifest_etags.pop(blob_client.url, None)
         logger.info("Manifest blob %s not found; initializing empty manifest.", blob_client.blob_name)
         return {}
+    except HttpResponseError as exc:
+        if known and exc.status_code == 304:
+            return known[1]
+        raise
+
+    manifest = orjson.loads(downloader.readall())
+    _remember_manifest(blob_client, downloader.properties.etag, manifest)
+    return manifest
+
+def load_manifest(blob_client: BlobClient, logger: logging.Logger) -> dict:
+    """
+    Parsed manifest, memoized per blob URL for MANIFEST_CACHE_TTL seconds.
+    Callers get their own deep copy, so mutating it never leaks into the cache.
+    """
+    try:
+        return copy.deepcopy(_fetch_manifest(blob_client, logger))
     except Exception as exc:
         logger.warning("Unable to load manifest from blob %s: %s", blob_client.blob_name, exc)
         return {}
 
+def load_manifest_with_etag(blob_client: BlobClient, logger: logging.Logger) -> Tuple[dict, Optional[str]]:
+    """
+    Load the manifest together with its ETag. A missing blob yields ({}, None);
+    any other error is raised so a conditional write never starts from a bad read.
+    """
+    try:
+        downloader = blob_client.download_blob()
+    except ResourceNotFoundError:
+        logger.info("Manifest blob %s not found; initializing empty manifest.", blob_client.blob_name)
+        return {}, None
+    return orjson.loads(downloader.readall()), downloader.properties.etag
+
+def update_manifest_atomically(
+    blob_client: BlobClient,
+    mutate: Callable[[dict], None],
+    logger: logging.Logger,
+) -> dict:
+    """
+    Read-modify-write the manifest with optimistic concurrency.
+
+    mutate(manifest) is applied to a freshly loaded manifest, which is written back
+    only if the blob is unchanged since the read (If-Match on its ETag, or
+    If-None-Match: * when it did not exist yet). On conflict the manifest is
+    reloaded and mutate re-applied.
+    """
+    @retry(exceptions=(ResourceModifiedError, ResourceExistsError), should_retry=lambda exc: True)
+    def attempt() -> Tuple[dict, Optional[str]]:
+        manifest, etag = load_manifest_with_etag(blob_client, logger)
+        mutate(manifest)
+        payload = orjson.dumps(manifest, option=MANIFEST_DUMP_OPTIONS)
+
+        if etag is None:
+            written = blob_client.upload_blob(payload, overwrite=True, match_condition=MatchConditions.IfMissing)
+        else:
+            written = blob_client.upload_blob(
+                payload,
+                overwrite=True,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+            )
+        return manifest, written.get("etag")
+
+    manifest, etag = attempt()
+    # What was just written is the freshest copy; later reads in this process reuse it.
+    cached_copy = copy.deepcopy(manifest)
+    _fetch_manifest.prime(cached_copy, blob_client, logger)
+    _remember_manifest(blob_client, etag, cached_copy)
+    return manifest
+
 def _suffix_from_url(url: str) -> str:
     """
     Infer file suffix from the download URL.
@@ -50,17 +162,23 @@ def download_owl(fileLocation: str, ontology_id: str, container_client: Containe
     suffix = _suffix_from_url(fileLocation)
 
     logger.info("Requesting download: %s", fileLocation)
-    response = requests.get(fileLocation, stream=True, timeout=120)
-    response.raise_for_status()
+    with requests.get(fileLocation, stream=True, timeout=(10, 3600)) as response:
+        response.raise_for_status()
 
-    # Blob client from connection string
-    blob_client = container_client.get_blob_client(blob=blob_name)
+        # Hand the socket stream to the SDK: it reads whole blocks and stages them
+        # in parallel, instead of being fed 8 KiB chunks from a Python generator.
+        response.raw.decode_content = True
+
+        # Blob client from connection string
+        blob_client = container_client.get_blob_client(blob=blob_name)
+
+        logger.info("Uploading stream to blob: bronzelayer/%s", blob_name)
+        blob_client.upload_blob(
+            data=response.raw,
+            overwrite=True,
+            blob_type="BlockBlob",
+            max_concurrency=OWL_UPLOAD_CONCURRENCY
+        )
 
-    logger.info("Uploading stream to blob: bronzelayer/%s", blob_name)
-    blob_client.upload_blob(
-        data=response.iter_content(chunk_size=8192),
-        overwrite=True
-    )
-    
     logger.info("Upload completed")
     return blob_name
\ No newline at end of file
@@ -1,17 +1,369 @@
-import requests
+import hashlib
+import html
+import json
+import os
 import re
 import logging
+import tempfile
+import threading
+import time
+
+import requests
 
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
-from typing import Dict
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.sessions import create_session
+
+try:
+    import lxml.etree
+    # libxml2-backed tree builder when lxml is installed, pure-Python otherwise.
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Only build the nodes a parser reads: listing/download tables, or links.
+TABLES_ONLY = SoupStrainer("table")
+LINKS_ONLY = SoupStrainer("a", href=True)
+# FooDB / MarkerDB keep their download listings in table.table-standard. The strainer
+# sees the raw class attribute, so match the class as a token rather than the whole value.
+STANDARD_TABLES_ONLY = SoupStrainer("table", class_=re.compile(r"(?:^|\s)table-standard(?:\s|$)"))
+
+DRUGCENTRAL_DUMP_RE = re.compile(
+    r"drugcentral\.dump\.(\d{2})(\d{2})(\d{4})\.sql\.gz",
+    flags=re.IGNORECASE
+)
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+HPA_VERSION_RE = re.compile(
+    r"Human Protein Atlas\s+version\s+([\d.]+)",
+    flags=re.IGNORECASE
+)
+
+# Keep-alive connections are reused across the version lookups of one run.
+SESSION = create_session(pool_connections=16, pool_maxsize=16)
+SESSION.headers.update({
+    "User-Agent": "bronze-layer-ingestion/1.0"
+})
+
+VERSION_LOOKUP_WORKERS = 12
+
+# Resolved page versions are kept on disk for an hour, so repeated checks of the
+# same source (across tasks on a node) skip the HTTP round trip and the parse.
+VERSION_CACHE_DIR = Path(tempfile.gettempdir()) / "bronze_versions"
+VERSION_CACHE_TTL = 3600  # seconds
+
+def _version_cache_path(func_name: str, url: str, filename: str) -> Path:
+    digest = hashlib.sha1(f"{func_name}\0{url}\0{filename}".encode("utf-8")).hexdigest()
+    return VERSION_CACHE_DIR / f"{digest}.json"
+
+def _read_cached_version(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
 
-def HGNC_version(logger: logging.Logger) -> str: # data passed as placeholder 
-    endpoint = "https://www.genenames.org/rest/info"
+def _write_cached_version(path: Path, version: str, validators: Dict[str, str]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"version": version, "fetched_at": time.time(), "validators": validators}, handle)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Cache is best effort: an unwritable temp dir just means no caching.
+        pass
+
+class _NotModified(Exception):
+    """The page is unchanged since the cached version was resolved (HTTP 304)."""
+
+# Per-thread request state shared between cached_version and _get_page: the
+# conditional headers to send, and the validators of the page that was fetched.
+_request_state = threading.local()
+
+def _get_page(url: str, timeout: int = 60) -> requests.Response:
+    """
+    GET a version page, conditionally on the cached ETag / Last-Modified when
+    called under cached_version.
+    """
+    headers = getattr(_request_state, "conditional_headers", None) or {}
+    # Streamed so the body is only downloaded once we know it is needed.
+    resp = SESSION.get(url, timeout=timeout, headers=headers, stream=True)
+    if resp.status_code == 304:
+        resp.close()
+        raise _NotModified(url)
+
+    validators = {
+        name: resp.headers[name] for name in ("ETag", "Last-Modified") if name in resp.headers
+    }
+    # Some servers ignore the conditional headers and answer 200 regardless;
+    # unchanged validators still mean the page has not moved.
+    if resp.ok and _validators_match(validators, headers):
+        resp.close()
+        raise _NotModified(url)
+
+    _request_state.validators = validators
+    return resp
+
+def _validators_match(validators: Dict[str, str], conditional_headers: Dict[str, str]) -> bool:
+    if "ETag" in validators and "If-None-Match" in conditional_headers:
+        return validators["ETag"] == conditional_headers["If-None-Match"]
+    if "Last-Modified" in validators and "If-Modified-Since" in conditional_headers:
+        return validators["Last-Modified"] == conditional_headers["If-Modified-Since"]
+    return False
+
+def cached_version(func: Callable[[str, str, logging.Logger], str]) -> Callable[..., str]:
+    """
+    Cache a *_parse_version_from_page result on disk for VERSION_CACHE_TTL seconds,
+    keyed by (function, url, filename).
+
+    Once the entry is stale the page is re-requested conditionally (If-None-Match /
+    If-Modified-Since); a 304 keeps the cached version without downloading or
+    parsing the page. force_refresh=True bypasses the cache and the validators.
+    If the page cannot be fetched, the last cached version (however old) is
+    returned instead of failing the run.
+    """
+    @wraps(func)
+    def wrapper(url: str, filename: str, logger: logging.Logger, force_refresh: bool = False) -> str:
+        path = _version_cache_path(func.__name__, url, filename)
+        entry = _read_cached_version(path)
+
+        if entry and not force_refresh and time.time() - float(entry["fetched_at"]) < VERSION_CACHE_TTL:  # type: ignore
+            logger.info("Using cached version %s from %s", entry["version"], url)
+            return str(entry["version"])
+
+        validators: Dict[str, str] = (entry or {}).get("validators") or {}  # type: ignore
+        conditional_headers = {}
+        if entry and not force_refresh:
+            if "ETag" in validators:
+                conditional_headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                conditional_headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        _request_state.conditional_headers = conditional_headers
+        _request_state.validators = {}
+        try:
+            version = func(url, filename, logger)
+        except _NotModified:
+            logger.info("%s not modified; keeping cached version %s", url, entry["version"])  # type: ignore
+            _write_cached_version(path, str(entry["version"]), validators)  # type: ignore
+            return str(entry["version"])  # type: ignore
+        except requests.RequestException as exc:
+            if not entry:
+                raise
+            logger.warning(
+                "Could not fetch %s (%s); falling back to cached version %s",
+                url, exc, entry["version"]
+            )
+            return str(entry["version"])
+        finally:
+            _request_state.conditional_headers = None
+
+        _write_cached_version(path, version, _request_state.validators)
+        return version
+
+    return wrapper
+
+def fetch_all_versions(
+    specs: Dict[str, Tuple[Callable[[str, str, logging.Logger], str], str, str]],
+    logger: logging.Logger,
+) -> Dict[str, str]:
+    """
+    Run independent *_parse_version_from_page lookups concurrently.
+
+    Args:
+        specs: source id -> (parse function, page url, filename)
+        logger: Logger instance for logging
+
+    Returns:
+        source id -> remote version, for every lookup that succeeded
+    """
+    versions: Dict[str, str] = {}
+    if not specs:
+        return versions
+
+    with ThreadPoolExecutor(max_workers=min(VERSION_LOOKUP_WORKERS, len(specs))) as ex:
+        futures = {
+            ex.submit(fn, url, filename, logger): source_id
+            for source_id, (fn, url, filename) in specs.items()
+        }
+        for future in as_completed(futures):
+            source_id = futures[future]
+            try:
+                versions[source_id] = future.result()
+            except Exception as exc:
+                logger.warning("Version lookup failed for %s: %s", source_id, exc)
+
+    return versions
+
+def _fixed_length_iso(length: int) -> Callable[[str], datetime]:
+    def parse(raw: str) -> datetime:
+        if len(raw) != length:
+            raise ValueError(f"time data {raw!r} is not {length} characters long")
+        return datetime.fromisoformat(raw)
+    return parse
+
+MONTH_NUMBERS = {
+    name: number
+    for number, name in enumerate(
+        ("january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"),
+        start=1,
+    )
+}
+
+def _month_day_year(raw: str) -> datetime:
+    # e.g. "April 7 2020"
+    month, day, year = raw.split()
+    number = MONTH_NUMBERS.get(month.lower())
+    if number is None:
+        raise ValueError(f"time data {raw!r} has an unknown month name")
+    return datetime(int(year), number, int(day))
+
+# Known layouts skip strptime, which re-reads its format string and consults the
+# locale on every call: numeric ISO ones go through the C-level fromisoformat.
+TIMESTAMP_PARSERS: Dict[str, Callable[[str], datetime]] = {
+    "%Y-%m-%d": _fixed_length_iso(10),
+    "%Y-%m-%d %H:%M": _fixed_length_iso(16),
+    "%Y-%m-%d %H:%M:%S": _fixed_length_iso(19),
+    "%B %d %Y": _month_day_year,
+}
+
+def _parse_timestamp(raw: str, fmt: str) -> datetime:
+    parse = TIMESTAMP_PARSERS.get(fmt)
+    if parse is None:
+        return datetime.strptime(raw, fmt)
+    return parse(raw)
+
+def _listing_rows(resp: requests.Response, source: str) -> Iterator[Tuple[Optional[str], List[str]]]:
+    """
+    Rows of the first table in a directory listing, as (text of the row's first
+    link or None, stripped text of each cell).
+
+    With lxml the rows are parsed by iterparse straight off the (streamed) socket
+    and dropped once yielded, so a caller that stops at the first match neither
+    downloads nor builds the rest of the listing; otherwise BeautifulSoup is used.
+    """
+    count = 0
+
+    if HTML_PARSER == "lxml":
+        in_table = False
+        resp.raw.decode_content = True
+        events = lxml.etree.iterparse(
+            resp.raw, events=("start", "end"), tag=("table", "tr"), html=True
+        )
+        for event, elem in events:
+            if elem.tag == "table":
+                if event == "end":
+                    break
+                in_table = True
+                continue
+            if event != "end" or not in_table:
+                continue
+
+            link = elem.find(".//a")
+            row = (
+                "".join(link.itertext()).strip() if link is not None else None,
+                ["".join(td.itertext()).strip() for td in elem.iter("td")],
+            )
+
+            # Release the row and any already processed siblings
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+            count += 1
+            yield row
+
+        if not in_table:
+            raise ValueError(f"{source}: could not find directory listing table.")
+    else:
+        table = BeautifulSoup(resp.content, HTML_PARSER, parse_only=TABLES_ONLY).find("table")
+        if not table:
+            raise ValueError(f"{source}: could not find directory listing table.")
+
+        for tr in table.find_all("tr"):
+            link = tr.find("a")
+            count += 1
+            yield (
+                link.get_text(strip=True) if link else None,
+                [td.get_text(strip=True) for td in tr.find_all("td")],
+            )
+
+    if count < 2:  # Need at least header + one data row
+        raise ValueError(f"{source}: table has insufficient rows.")
+
+def _parse_listing(
+    url: str,
+    *,
+    source: str,
+    match: Callable[[str], bool],
+    date_col: int,
+    fmt: str,
+    missing: str,
+    logger: logging.Logger,
+    latest: bool = False,
+) -> str:
+    """
+    Shared directory-listing lookup: find rows whose link text satisfies `match`
+    and parse the timestamp in cell `date_col` with `fmt`.
+
+    Returns the date (YYYY-MM-DD) of the first matching row, or of the most
+    recent one when latest=True. Unparsable timestamps are skipped with a warning.
+
+    Raises:
+        ValueError: If table structure is unexpected or no matching row has a date
+    """
+    resp = _get_page(url)
+    resp.raise_for_status()
+
+    # The listing formats (YYYY-MM-DD HH:MM[:SS]) sort like the times they
+    # encode, so the latest stamp is tracked as a string and only candidates
+    # that beat it get parsed.
+    best_raw = ""
+    best: Optional[datetime] = None
+
+    # Closing drops the connection when the loop stops before the end of the page.
+    with resp:
+        for link_text, cells in _listing_rows(resp, source):
+            if link_text is None or not match(link_text):
+                continue
+            if len(cells) <= date_col:
+                continue
+
+            raw_date = cells[date_col]
+            if not raw_date or raw_date <= best_raw:
+                continue
+
+            try:
+                dt = _parse_timestamp(raw_date, fmt)
+            except ValueError:
+                logger.warning("%s: could not parse timestamp '%s'", source, raw_date)
+                continue
 
+            best_raw, best = raw_date, dt
+            if not latest:
+                break
+
+    if best is None:
+        raise ValueError(f"{source}: {missing} not found in directory listing.")
+
+    version = best.strftime("%Y-%m-%d")
+    logger.info("Detected %s remote version %s", source, version)
+    return version
+
+HGNC_INFO_URL = "https://www.genenames.org/rest/info"
+QUICKGO_ABOUT_URL = "https://www.ebi.ac.uk/QuickGO/services/annotation/about"
+
+@cached_version
+def _HGNC_api_version(endpoint: str, filename: str, logger: logging.Logger) -> str:
     logger.info("Fetching HGNC version info from %s", endpoint)
 
-    response = requests.get(endpoint, timeout=10)
+    response = _get_page(endpoint, timeout=10)
     response.raise_for_status()
 
     payload = response.json()
@@ -24,12 +376,14 @@ def HGNC_version(logger: logging.Logger) -> str: # data passed as placeholder
 
     return version
 
-def QUICKGO_version(logger: logging.Logger) -> str: # data passed as placeholder 
-    endpoint = "https://www.ebi.ac.uk/QuickGO/services/annotation/about"
+def HGNC_version(logger: logging.Logger) -> str: # data passed as placeholder 
+    return _HGNC_api_version(HGNC_INFO_URL, "", logger)
 
+@cached_version
+def _QUICKGO_api_version(endpoint: str, filename: str, logger: logging.Logger) -> str:
     logger.info("Fetching HGNC version info from %s", endpoint)
 
-    response = requests.get(endpoint, timeout=10)
+    response = _get_page(endpoint, timeout=10)
     response.raise_for_status()
 
     payload = response.json()
@@ -41,6 +395,10 @@ def QUICKGO_version(logger: logging.Logger) -> str: # data passed as placeholder
 
     return version
 
+def QUICKGO_version(logger: logging.Logger) -> str: # data passed as placeholder 
+    return _QUICKGO_api_version(QUICKGO_ABOUT_URL, "", logger)
+
+@cached_version
 def TIGA_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract version from Apache directory listing by finding the 'Last modified' 
@@ -48,70 +406,39 @@ def TIGA_parse_version_from_page(url: str, filename: str, logger: logging.Logger
     """
     logger.info("Fetching TIGA version for file '%s' from %s", filename, url)
 
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    rows = soup.find_all("tr")
-    if not rows:
-        raise ValueError("TIGA: no rows found in directory listing.")
-
-    for row in rows:
-        cols = row.find_all("td")
-        if len(cols) < 3:
-            continue
-
-        link = cols[1].find("a")
-        if not link:
-            continue
-
-        file_name = link.get_text(strip=True)
-
-        # Match the specific filename we're looking for
-        if filename not in file_name:
-            continue
-
-        raw_ts = cols[2].get_text(strip=True)
-        if not raw_ts:
-            continue
-
-        try:
-            # Format: YYYY-MM-DD HH:MM
-            dt = datetime.strptime(raw_ts, "%Y-%m-%d %H:%M")
-            version = dt.strftime("%Y-%m-%d")
-            logger.info("Detected TIGA remote version %s for file '%s'", version, file_name)
-            return version
-        except ValueError:
-            logger.warning("TIGA: could not parse timestamp '%s'", raw_ts)
-            continue
-
-    raise ValueError(f"TIGA: file containing '{filename}' not found in directory listing.")
+    return _parse_listing(
+        url,
+        source="TIGA",
+        match=lambda name: filename in name,
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        missing=f"file containing '{filename}'",
+        logger=logger,
+    )
 
+@cached_version
 def DrugCentral_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract DrugCentral version from dump filename:
     e.g. drugcentral.dump.11012023.sql.gz -> 2023-01-11
     """
     logger.info("Fetching DrugCentral version from %s", url)
-    import pdb
-    pdb.set_trace()
-    resp = requests.get(url, timeout=60)
+    resp = _get_page(url)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(resp.content, HTML_PARSER, parse_only=LINKS_ONLY)
 
     links = soup.find_all("a", href=True)
 
     for a in links:
         href = a["href"]
 
+        # Cheap substring test first; most links on the page are not dumps.
+        if "drugcentral.dump." not in href.lower():
+            continue
+
         # Match: drugcentral.dump.11012023.sql.gz
-        match = re.search(
-            r"drugcentral\.dump\.(\d{2})(\d{2})(\d{4})\.sql\.gz",
-            href,
-            flags=re.IGNORECASE
-        )
+        match = DRUGCENTRAL_DUMP_RE.search(href)
 
         if not match:
             continue
@@ -119,7 +446,7 @@ def DrugCentral_parse_version_from_page(url: str, filename: str, logger: logging
         day, month, year = match.groups()
 
         try:
-            dt = datetime.strptime(f"{year}-{month}-{day}", "%Y-%m-%d")
+            dt = datetime(int(year), int(month), int(day))
         except ValueError:
             raise ValueError(f"Invalid date parsed from filename: {href}")
 
@@ -132,13 +459,14 @@ def DrugCentral_parse_version_from_page(url: str, filename: str, logger: logging
         "(expected drugcentral.dump.<DDMMYYYY>.sql.gz)"
     )
 
+@cached_version
 def FooDB_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     logger.info("Fetching FooDB version from %s", url)
 
-    resp = requests.get(url, timeout=60)
+    resp = _get_page(url)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(resp.content, HTML_PARSER, parse_only=STANDARD_TABLES_ONLY)
 
     tables = soup.find_all("table", class_="table-standard")
     if not tables:
@@ -174,7 +502,7 @@ def FooDB_parse_version_from_page(url: str, filename: str, logger: logging.Logge
 
             try:
                 # Example: "April 7 2020", "October 13 2022"
-                dt = datetime.strptime(raw_date, "%B %d %Y")
+                dt = _parse_timestamp(raw_date, "%B %d %Y")
                 version = dt.strftime("%Y-%m-%d")
                 logger.info("Detected FooDB remote version %s", version)
                 return version
@@ -184,21 +512,18 @@ def FooDB_parse_version_from_page(url: str, filename: str, logger: logging.Logge
 
     raise ValueError("FooDB: matching file not found in download table.")
 
+@cached_version
 def HPA_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     logger.info("Fetching HPA version from %s", url)
 
-    resp = requests.get(url, timeout=60)
+    resp = _get_page(url)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    # Only a phrase of visible text is needed: drop tags and decode entities
+    # (e.g. &nbsp;) instead of building a DOM for get_text().
+    page_text = html.unescape(HTML_TAG_RE.sub(" ", resp.text))
 
-    page_text = soup.get_text(" ", strip=True)
-
-    match = re.search(
-        r"Human Protein Atlas\s+version\s+([\d.]+)",
-        page_text,
-        flags=re.IGNORECASE
-    )
+    match = HPA_VERSION_RE.search(page_text)
 
     if not match:
         raise ValueError(
@@ -211,6 +536,7 @@ def HPA_parse_version_from_page(url: str, filename: str, logger: logging.Logger)
     logger.info("Detected HPA remote version %s", formatted_version)
     return formatted_version
 
+@cached_version
 def ChEMBL_parse_version_from_page(
     url: str, 
     filename: str, 
@@ -232,58 +558,24 @@ def ChEMBL_parse_version_from_page(
     """
     logger.info("Fetching ChEMBL version for file '%s' from %s", filename, url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table (there's only one in directory listings)
-    table = soup.find("table")
-    if not table:
-        raise ValueError("ChEMBL: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("ChEMBL: table has insufficient rows.")
-    
-    # Find the row containing our filename
-    target_row = None
-    for row in rows:
-        # Look for <a> tag with matching filename
-        link = row.find("a")
-        if link and filename in link.get_text(strip=True):
-            target_row = row
-            break
-    
-    if not target_row:
-        raise ValueError(f"ChEMBL: file containing '{filename}' not found in directory listing.")
-    
-    # Extract all cells from the row
-    cells = target_row.find_all("td")
-    if len(cells) < 3:
-        raise ValueError(f"ChEMBL: row for '{filename}' has insufficient columns.")
-    
-    # Last modified is in the 3rd column (index 2)
-    raw_date = cells[2].get_text(strip=True)
-    
-    # Parse the date (format: "YYYY-MM-DD HH:MM")
-    try:
-        dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M")
-        version = dt.strftime("%Y-%m-%d")
-    except ValueError as e:
-        raise ValueError(f"ChEMBL: could not parse date '{raw_date}': {e}")
-    
-    logger.info("Detected ChEMBL remote version %s for file '%s'", version, filename)
-    return version
+    return _parse_listing(
+        url,
+        source="ChEMBL",
+        match=lambda name: filename in name,
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        missing=f"file containing '{filename}'",
+        logger=logger,
+    )
 
+@cached_version
 def MarkerDB_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     logger.info("Fetching MarkerDB version from %s", url)
 
-    resp = requests.get(url, timeout=60)
+    resp = _get_page(url)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(resp.content, HTML_PARSER, parse_only=STANDARD_TABLES_ONLY)
 
     # Find the table containing "Released On"
     table = soup.find("table", class_="table-standard")
@@ -315,7 +607,7 @@ def MarkerDB_parse_version_from_page(url: str, filename: str, logger: logging.Lo
         raw_date = cells[released_idx].get_text(strip=True)
 
         try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d")
+            dt = _parse_timestamp(raw_date, "%Y-%m-%d")
             dates.append(dt)
         except ValueError:
             logger.warning("Skipping unparsable date: %s", raw_date)
@@ -329,6 +621,7 @@ def MarkerDB_parse_version_from_page(url: str, filename: str, logger: logging.Lo
     logger.info("Detected MarkerDB remote version %s", version)
     return version
 
+@cached_version
 def GWASCATALOG_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract the 'Last modified' date for a specific file from GWAS Catalog directory listing.
@@ -346,47 +639,17 @@ def GWASCATALOG_parse_version_from_page(url: str, filename: str, logger: logging
     """
     logger.info("Fetching GWAS Catalog version from %s", url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table
-    table = soup.find("table")
-    if not table:
-        raise ValueError("GWAS Catalog: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("GWAS Catalog: table has insufficient rows.")
-    
-    # Find the row containing our filename
-    for row in rows:
-        # Look for <a> tag with matching filename
-        link = row.find("a")
-        if not link or filename not in link.get_text(strip=True):
-            continue
-        
-        # Extract all cells from the row
-        cells = row.find_all("td")
-        if len(cells) < 3:
-            continue
-        
-        # Last modified is in the 3rd column (index 2)
-        raw_date = cells[2].get_text(strip=True)
-        
-        # Parse the date (format: "YYYY-MM-DD HH:MM")
-        try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M")
-            version = dt.strftime("%Y-%m-%d")
-            logger.info("Detected GWAS Catalog remote version %s", version)
-            return version
-        except ValueError as e:
-            raise ValueError(f"GWAS Catalog: could not parse date '{raw_date}': {e}")
-    
-    raise ValueError("GWAS Catalog: matching file not found in directory listing.")
+    return _parse_listing(
+        url,
+        source="GWAS Catalog",
+        match=lambda name: filename in name,
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        missing="matching file",
+        logger=logger,
+    )
 
+@cached_version
 def ClinVar_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract the 'Last Modified' date for a specific file from ClinVar directory listing.
@@ -404,49 +667,17 @@ def ClinVar_parse_version_from_page(url: str, filename: str, logger: logging.Log
     """
     logger.info("Fetching ClinVar version from %s", url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table
-    table = soup.find("table")
-    if not table:
-        raise ValueError("ClinVar: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("ClinVar: table has insufficient rows.")
-    
-    # Find the row containing our filename
-    for row in rows:
-        # Look for <a> tag with matching filename
-        link = row.find("a")
-        if not link or filename not in link.get_text(strip=True):
-            continue
-        
-        # Extract all cells from the row
-        cells = row.find_all("td")
-        if len(cells) < 4:
-            continue
-        
-        # Last Modified is in the 4th column (index 3)
-        raw_date = cells[3].get_text(strip=True)
-        if not raw_date:
-            continue
-        
-        # Parse the date (format: "YYYY-MM-DD HH:MM:SS")
-        try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M:%S")
-            version = dt.strftime("%Y-%m-%d")
-            logger.info("Detected ClinVar remote version %s", version)
-            return version
-        except ValueError as e:
-            raise ValueError(f"ClinVar: could not parse date '{raw_date}': {e}")
-    
-    raise ValueError("ClinVar: matching file not found in directory listing.")
+    return _parse_listing(
+        url,
+        source="ClinVar",
+        match=lambda name: filename in name,
+        date_col=3,
+        fmt="%Y-%m-%d %H:%M:%S",
+        missing="matching file",
+        logger=logger,
+    )
 
+@cached_version
 def UniProt_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract the 'Last modified' date for UniProt .dat.gz files from directory listing.
@@ -465,65 +696,22 @@ def UniProt_parse_version_from_page(url: str, filename: str, logger: logging.Log
     """
     logger.info("Fetching UniProt version from %s", url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table
-    table = soup.find("table")
-    if not table:
-        raise ValueError("UniProt: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("UniProt: table has insufficient rows.")
-    
-    timestamps = []
-    
-    # Find all rows containing .dat.gz files with trembl or sprot
-    for row in rows:
-        link = row.find("a")
-        if not link:
-            continue
-        
-        file_name = link.get_text(strip=True).lower()
-        
-        # Check if file is .dat.gz and contains trembl or sprot
-        if not file_name.endswith(".dat.gz"):
-            continue
-        
-        if "trembl" not in file_name and "sprot" not in file_name:
-            continue
-        
-        # Extract all cells from the row
-        cells = row.find_all("td")
-        if len(cells) < 3:
-            continue
-        
-        # Last modified is in the 3rd column (index 2)
-        raw_date = cells[2].get_text(strip=True)
-        if not raw_date:
-            continue
-        
-        # Parse the date (format: "YYYY-MM-DD HH:MM")
-        try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M")
-            timestamps.append(dt)
-        except ValueError:
-            logger.warning("UniProt: could not parse timestamp '%s'", raw_date)
-            continue
-    
-    if not timestamps:
-        raise ValueError("UniProt: no .dat.gz files with 'trembl' or 'sprot' found in directory listing.")
-    
-    # Return the latest timestamp among matching files
-    latest = max(timestamps)
-    version = latest.strftime("%Y-%m-%d")
-    logger.info("Detected UniProt remote version %s", version)
-    return version
+    def is_release_file(name: str) -> bool:
+        name = name.lower()
+        return name.endswith(".dat.gz") and ("trembl" in name or "sprot" in name)
+
+    return _parse_listing(
+        url,
+        source="UniProt",
+        match=is_release_file,
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        latest=True,
+        missing=".dat.gz files with 'trembl' or 'sprot'",
+        logger=logger,
+    )
 
+@cached_version
 def OpenTargets_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract the 'Last modified' date of the 'output/' folder from OpenTargets directory listing.
@@ -544,52 +732,17 @@ def OpenTargets_parse_version_from_page(url: str, filename: str, logger: logging
     
     logger.info("Fetching OpenTargets version from %s", url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table
-    table = soup.find("table")
-    if not table:
-        raise ValueError("OpenTargets: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("OpenTargets: table has insufficient rows.")
-    
-    # Find the row containing the output/ folder
-    for row in rows:
-        link = row.find("a")
-        if not link:
-            continue
-        
-        folder_name = link.get_text(strip=True)
-        if folder_name != "output/":
-            continue
-        
-        # Extract all cells from the row
-        cells = row.find_all("td")
-        if len(cells) < 3:
-            continue
-        
-        # Last modified is in the 3rd column (index 2)
-        raw_date = cells[2].get_text(strip=True)
-        if not raw_date:
-            continue
-        
-        # Parse the date (format: "YYYY-MM-DD HH:MM")
-        try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M")
-            version = dt.strftime("%Y-%m-%d")
-            logger.info("Detected OpenTargets remote version %s", version)
-            return version
-        except ValueError as e:
-            raise ValueError(f"OpenTargets: could not parse date '{raw_date}': {e}")
-    
-    raise ValueError("OpenTargets: 'output/' folder not found in directory listing.")
+    return _parse_listing(
+        url,
+        source="OpenTargets",
+        match=lambda name: name == "output/",
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        missing="'output/' folder",
+        logger=logger,
+    )
 
+@cached_version
 def ChEBI_SQL_parse_version_from_page(url: str, filename: str, logger: logging.Logger) -> str:
     """
     Extract the 'Last modified' date from the first .sql.zip file in ChEBI directory listing.
@@ -607,48 +760,13 @@ def ChEBI_SQL_parse_version_from_page(url: str, filename: str, logger: logging.L
     """
     logger.info("Fetching ChEBI SQL version from %s", url)
     
-    resp = requests.get(url, timeout=60)
-    resp.raise_for_status()
-    
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    # Find the main table
-    table = soup.find("table")
-    if not table:
-        raise ValueError("ChEBI SQL: could not find directory listing table.")
-    
-    # Find all table rows
-    rows = table.find_all("tr")
-    if len(rows) < 2:  # Need at least header + one data row
-        raise ValueError("ChEBI SQL: table has insufficient rows.")
-    
-    # Find the first .sql.zip file
-    for row in rows:
-        link = row.find("a")
-        if not link:
-            continue
-        
-        file_name = link.get_text(strip=True)
-        if not file_name.endswith(".sql.zip"):
-            continue
-        
-        # Extract all cells from the row
-        cells = row.find_all("td")
-        if len(cells) < 3:
-            continue
-        
-        # Last modified is in the 3rd column (index 2)
-        raw_date = cells[2].get_text(strip=True)
-        if not raw_date:
-            continue
-        
-        # Parse the date (format: "YYYY-MM-DD HH:MM")
-        try:
-            dt = datetime.strptime(raw_date, "%Y-%m-%d %H:%M")
-            version = dt.strftime("%Y-%m-%d")
-            logger.info("Detected ChEBI SQL remote version %s", version)
-            return version
-        except ValueError as e:
-            raise ValueError(f"ChEBI SQL: could not parse date '{raw_date}': {e}")
-    
-    raise ValueError("ChEBI SQL: no .sql.zip files found in directory listing.")
\ No newline at end of file
+    return _parse_listing(
+        url,
+        source="ChEBI SQL",
+        match=lambda name: name.endswith(".sql.zip"),
+        date_col=2,
+        fmt="%Y-%m-%d %H:%M",
+        missing=".sql.zip files",
+        logger=logger,
+    )
+
@@ -0,0 +1,116 @@
+import logging
+import random
+import time
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from typing import Callable, Optional, Tuple, Type
+
+from azure.batch.models import BatchErrorException
+from azure.batch.custom.custom_errors import CreateTasksErrorException
+from azure.core.exceptions import HttpResponseError
+
+logger = logging.getLogger("Retry")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 503})
+
+DEFAULT_EXCEPTIONS: Tuple[Type[BaseException], ...] = (
+    BatchErrorException,
+    CreateTasksErrorException,
+    HttpResponseError,
+)
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Transient throttling / server errors are retryable. A CreateTasksErrorException
+    is retryable only when no task was rejected and every request error is transient.
+    """
+    if isinstance(exc, CreateTasksErrorException):
+        return (
+            not exc.failure_tasks
+            and bool(exc.errors)
+            and all(is_retryable(err) for err in exc.errors)
+        )
+    return _status_code(exc) in RETRYABLE_STATUS_CODES
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header (delta-seconds or HTTP-date) from the failed response.
+    """
+    if isinstance(exc, CreateTasksErrorException):
+        delays = [retry_after_seconds(err) for err in exc.errors]
+        delays = [d for d in delays if d is not None]
+        return max(delays) if delays else None
+
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def retry(
+    exceptions: Tuple[Type[BaseException], ...] = DEFAULT_EXCEPTIONS,
+    tries: int = 6,
+    base: float = 1.0,
+    cap: float = 30.0,
+    jitter: bool = True,
+    should_retry: Callable[[BaseException], bool] = is_retryable,
+) -> Callable:
+    """
+    Retry the wrapped call on transient errors.
+
+    Sleeps for the server's Retry-After when given, otherwise uses decorrelated-jitter
+    backoff: sleep = min(cap, uniform(base, previous_sleep * 3)).
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            delay = base
+            for attempt in range(1, tries + 1):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as exc:
+                    if attempt == tries or not should_retry(exc):
+                        raise
+
+                    sleep = retry_after_seconds(exc)
+                    if sleep is None:
+                        if jitter:
+                            delay = min(cap, random.uniform(base, delay * 3))
+                        else:
+                            delay = min(cap, base * (2 ** (attempt - 1)))
+                        sleep = delay
+
+                    logger.warning(
+                        "%s failed (attempt %d/%d): %s. Retrying in %.1fs",
+                        getattr(func, "__qualname__", repr(func)),
+                        attempt,
+                        tries,
+                        exc,
+                        sleep,
+                    )
+                    time.sleep(sleep)
+        return wrapper
+    return decorator
@@ -0,0 +1,36 @@
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def create_session(
+    pool_connections: int = 10,
+    pool_maxsize: int = 50,
+    total_retries: int = 5,
+    backoff_factor: float = 0.5,
+) -> requests.Session:
+    """
+    Build a requests.Session with pooled keep-alive connections and retries on
+    throttling / transient server errors (honours Retry-After).
+    """
+    retries = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        # Hand the last response back so callers keep using raise_for_status().
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+
+from pathlib import Path
+from typing import Any, Dict
+
+import yaml
+
+# libyaml-backed loader when PyYAML was built with it, pure-Python otherwise.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def sidecar_path(config_path: Path) -> Path:
+    return config_path.with_suffix(".json")
+
+def _write_sidecar(sidecar: Path, document: Dict[str, Any]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=sidecar.parent, prefix=f".{sidecar.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(document, handle)
+        os.replace(tmp_path, sidecar)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def load_sources_document(config_path: Path) -> Dict[str, Any]:
+    """
+    Load the parsed sources.yaml document.
+
+    The YAML is parsed once and cached as a JSON sidecar (sources.json) next to it;
+    later loads read the sidecar as long as it is not older than the YAML.
+    """
+    sidecar = sidecar_path(config_path)
+
+    try:
+        if sidecar.stat().st_mtime >= config_path.stat().st_mtime:
+            with sidecar.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+    except (OSError, ValueError):
+        pass
+
+    with config_path.open("r", encoding="utf-8") as handle:
+        document = yaml.load(handle, Loader=YAML_LOADER) or {}
+
+    try:
+        _write_sidecar(sidecar, document)
+    except OSError:
+        # Read-only config directory: keep working off the YAML.
+        pass
+
+    return document
@@ -1,17 +1,63 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
-import json
+from typing import Callable, List, Optional
 
 from azure.storage.blob import ContainerClient, BlobClient, BlobServiceClient
 
 from utils.data import (
     load_manifest,
-    create_blob_client
+    create_blob_client,
+    update_manifest_atomically
 )
 
 MANIFEST_BLOB_NAME = "manifest.json"
+BLOB_MOVE_WORKERS = 16
+LIST_PAGE_SIZE = 5000  # service maximum for list_blobs
+COPY_POLL_INTERVAL = 1.0  # seconds
+
+class ManifestBatch:
+    """
+    Collects manifest edits and writes them in a single conditional upload when
+    the block exits cleanly; nothing is written if it raises.
+
+        with ManifestBatch(container, logger) as batch:
+            update_manifest(..., batch=batch)
+            update_latest_folder(...)
+    """
+
+    def __init__(self, container: ContainerClient, logger: logging.Logger):
+        self.container = container
+        self.logger = logger
+        self.edits: List[Callable[[dict], None]] = []
+
+    def add(self, edit: Callable[[dict], None]) -> None:
+        self.edits.append(edit)
+
+    def flush(self) -> None:
+        if not self.edits:
+            return
+
+        edits, self.edits = self.edits, []
+
+        def apply_all(manifest: dict) -> None:
+            for edit in edits:
+                edit(manifest)
+
+        update_manifest_atomically(
+            create_blob_client(self.container, MANIFEST_BLOB_NAME),
+            apply_all,
+            self.logger,
+        )
+
+    def __enter__(self) -> "ManifestBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
 
 def extract_version(source_id:str, container:BlobServiceClient, logger: logging.Logger) -> Optional[str]:
     manifest = load_manifest(create_blob_client(container, MANIFEST_BLOB_NAME), logger)
@@ -41,29 +87,56 @@ def update_manifest(
     hosts: list[str],
     list_of_files: list[str],
     logger: logging.Logger,
+    batch: Optional[ManifestBatch] = None,
 ) -> None:
+    """
+    Record a new version entry for source_id. With a batch, the edit is queued
+    and written when the batch flushes.
+    """
 
-    manifest_client = create_blob_client(container, MANIFEST_BLOB_NAME)
-    manifest = load_manifest(manifest_client, logger)
-
-    manifest[source_id] = {
-        "version": version,
-        "update_ts": update_ts,
-        "hosts": hosts,
-        "list_of_files": list_of_files,
-        "extracted": False
-    }
-
-    payload = json.dumps(manifest, indent=2).encode("utf-8")
-    manifest_client.upload_blob(payload, overwrite=True)
+    def set_entry(manifest: dict) -> None:
+        manifest[source_id] = {
+            "version": version,
+            "update_ts": update_ts,
+            "hosts": hosts,
+            "list_of_files": list_of_files,
+            "extracted": False
+        }
+
+    if batch is not None:
+        batch.add(set_entry)
+    else:
+        update_manifest_atomically(create_blob_client(container, MANIFEST_BLOB_NAME), set_entry, logger)
 
     logger.info(
-        "Updated manifest for source '%s' (version=%s, files=%d)",
+        "%s manifest for source '%s' (version=%s, files=%d)",
+        "Queued" if batch is not None else "Updated",
         source_id,
         version,
         len(list_of_files),
     )    
 
+def _move_blob(container: ContainerClient, src_name: str, dst_name: str, logger: logging.Logger) -> None:
+    """
+    Server-side copy src_name to dst_name, then delete the source once the copy
+    has completed (copies within an account usually finish synchronously).
+    """
+    logger.info("Moving old version: %s -> %s", src_name, dst_name)
+
+    src_blob = container.get_blob_client(src_name)
+    dst_blob = container.get_blob_client(dst_name)
+
+    copy = dst_blob.start_copy_from_url(src_blob.url)
+    status = copy.get("copy_status")
+    while status == "pending":
+        time.sleep(COPY_POLL_INTERVAL)
+        status = dst_blob.get_blob_properties().copy.status
+
+    if status != "success":
+        raise RuntimeError(f"Copy of {src_name} to {dst_name} ended with status {status!r}")
+
+    src_blob.delete_blob()
+
 def update_latest_folder(
     source_id: str,
     container: ContainerClient,
@@ -77,46 +150,51 @@ def update_latest_folder(
     """
 
     latest_prefix = f"raw/{source_id}/latest/"
-    blobs = list(container.list_blobs(name_starts_with=latest_prefix))
 
+    futures = {}
     moved_count = 0
 
-    for blob in blobs:
-        name = blob.name  # full blob path
+    # Each move is an independent copy + delete round trip; they are fanned out
+    # as the listing pages arrive rather than after the whole listing is read.
+    with ThreadPoolExecutor(max_workers=BLOB_MOVE_WORKERS) as ex:
+        for blob in container.list_blobs(name_starts_with=latest_prefix, results_per_page=LIST_PAGE_SIZE):
+            name = blob.name  # full blob path
 
-        # Expected:
-        # raw/{source_id}/latest/{blob_version}/path/to/file
-        parts = name.split("/")
+            # Expected:
+            # raw/{source_id}/latest/{blob_version}/path/to/file
+            parts = name.split("/")
 
-        # Safety check
-        if len(parts) < 5:
-            continue
+            # Safety check
+            if len(parts) < 5:
+                continue
 
-        blob_version = parts[3]  # after raw/{source_id}/latest/
-        print(blob_version)
+            blob_version = parts[3]  # after raw/{source_id}/latest/
 
-        # Keep current version
-        if blob_version == version:
-            continue
+            # Keep current version
+            if blob_version == version:
+                continue
 
-        # Compute relative path inside the version folder
-        relative_path = "/".join(parts[4:])
-        print(relative_path)
-        release_blob_name = (
-            f"raw/{source_id}/releases/{blob_version}/{relative_path}"
-        )
+            # Compute relative path inside the version folder
+            relative_path = "/".join(parts[4:])
+            release_blob_name = (
+                f"raw/{source_id}/releases/{blob_version}/{relative_path}"
+            )
 
-        logger.info("Moving old version: %s -> %s", name, release_blob_name)
+            futures[ex.submit(_move_blob, container, name, release_blob_name, logger)] = name
 
-        src_blob = container.get_blob_client(name)
-        dst_blob = container.get_blob_client(release_blob_name)
+        for future in as_completed(futures):
+            try:
+                future.result()
+                moved_count += 1
+            except Exception as exc:
+                logger.error("Failed to move %s to releases: %s", futures[future], exc)
 
-        dst_blob.start_copy_from_url(src_blob.url)
-        src_blob.delete_blob()
-
-        moved_count += 1
-    
     logger.info(
         "Folder update complete — moved %d blob(s) to releases.",
         moved_count,
-    )
\ No newline at end of file
+    )
+
+    if moved_count != len(futures):
+        raise RuntimeError(
+            f"Moved {moved_count} of {len(futures)} blob(s) to releases for {source_id}."
+        )